@@ -0,0 +1,61 @@
+"""Iterations to approval with and without rejected attempts in the fixer prompt.
+
+Runs every job of a JSONL file (same format as the batch CLI) twice: with the
+iteration history fed back to the fixer, and without it (the behaviour before
+rejected diffs and objections were added to the prompt). Reports approvals,
+mean iterations to approval and LLM calls per job for each mode.
+
+Record real model answers once, then replay them for repeatable numbers:
+
+    LLM_BACKEND=record LLM_REPLAY_PATH=iterations.jsonl PYTHONPATH=. python benchmarks/bench_iterations.py failures.jsonl
+    LLM_BACKEND=replay LLM_REPLAY_PATH=iterations.jsonl PYTHONPATH=. python benchmarks/bench_iterations.py failures.jsonl
+"""
+import argparse
+import json
+import statistics
+
+from src.agents.usage import total_usage
+from src.workflow.debug_workflow import DebugWorkflow
+
+
+def run_mode(jobs, model: str, max_iterations: int, use_history: bool) -> dict:
+    workflow = DebugWorkflow(model)
+    workflow.fixer_agent.use_history = use_history
+    iterations, calls, errors = [], [], 0
+    for job in jobs:
+        try:
+            result = workflow.debug_code(job["code"], job["error_log"], job.get("max_iterations", max_iterations),
+                                         language=job.get("language"))
+        except Exception:
+            errors += 1
+            continue
+        calls.append(total_usage(result).calls)
+        if result.get("final_result") is not None:
+            iterations.append(result["iteration_count"] + 1)
+    return {
+        "approved": len(iterations),
+        "mean_iterations": statistics.mean(iterations) if iterations else float("nan"),
+        "mean_llm_calls": statistics.mean(calls) if calls else float("nan"),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("jobs", help="JSONL file of {code, error_log} jobs")
+    parser.add_argument("--model", default="gpt-4")
+    parser.add_argument("--max-iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.jobs, encoding="utf-8") as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+
+    print(f"{len(jobs)} jobs, max {args.max_iterations} iterations")
+    for label, use_history in (("without history", False), ("with history", True)):
+        stats = run_mode(jobs, args.model, args.max_iterations, use_history)
+        print(f"{label:16} approved {stats['approved']:4}  iterations {stats['mean_iterations']:5.2f}  "
+              f"LLM calls {stats['mean_llm_calls']:5.2f}  errors {stats['errors']}")
+
+
+if __name__ == "__main__":
+    main()
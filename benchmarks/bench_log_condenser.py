@@ -0,0 +1,74 @@
+"""Benchmark the error-log condenser on large synthetic CI logs.
+
+Builds a log of roughly --size-mb megabytes mixing CI noise, repeated
+tracebacks, deep recursion and chained exceptions, then times condensing it.
+
+    PYTHONPATH=. python benchmarks/bench_log_condenser.py --size-mb 10
+"""
+import argparse
+import time
+
+from src.agents.log_condenser import LogCondenser
+
+NOISE = "2024-05-01T12:00:00.1234567Z Downloading package-{i}.whl (1.2 MB)\n"
+
+RECURSION = (
+    "Traceback (most recent call last):\n"
+    '  File "app.py", line 3, in <module>\n'
+    "    main()\n"
+    + '  File "app.py", line 10, in walk\n    return walk(node.parent)\n' * 200
+    + "RecursionError: maximum recursion depth exceeded\n\n"
+)
+
+CHAINED = (
+    "Traceback (most recent call last):\n"
+    '  File "config.py", line 4, in load\n'
+    "    value = settings['{key}']\n"
+    "KeyError: '{key}'\n\n"
+    "During handling of the above exception, another exception occurred:\n\n"
+    "Traceback (most recent call last):\n"
+    '  File "config.py", line 6, in load\n'
+    "    raise ConfigError('missing {key}')\n"
+    "ConfigError: missing {key}\n\n"
+)
+
+
+def make_log(size_mb: float) -> str:
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    size = 0
+    i = 0
+    while size < target:
+        if i % 500 == 0:
+            chunk = RECURSION
+        elif i % 97 == 0:
+            chunk = CHAINED.format(key=f"key_{i % 7}")
+        else:
+            chunk = NOISE.format(i=i)
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10.0, help="Approximate log size")
+    parser.add_argument("--token-budget", type=int, default=2000, help="Condensed log budget in tokens")
+    args = parser.parse_args()
+
+    condenser = LogCondenser(token_budget=args.token_budget)
+    for size_mb in (args.size_mb / 10, args.size_mb / 2, args.size_mb):
+        log = make_log(size_mb)
+        start = time.perf_counter()
+        result = condenser.condense(log)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{len(log) / 1e6:7.1f} MB -> {len(result.text):6} chars in {elapsed:6.3f}s "
+            f"({len(log) / 1e6 / elapsed:6.1f} MB/s), "
+            f"{result.traceback_count} tracebacks, {result.unique_tracebacks} distinct"
+        )
+
+
+if __name__ == "__main__":
+    main()
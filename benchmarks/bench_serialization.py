@@ -0,0 +1,64 @@
+"""Microbenchmark for the /debug response serialization path.
+
+Compares the stdlib json encoder with orjson on a realistic response payload,
+with and without the `fields=` projection, and reports gzip sizes.
+
+    python benchmarks/bench_serialization.py --lines 2000 --fixes 5
+"""
+import argparse
+import gzip
+import json
+import timeit
+
+import orjson
+
+
+def make_payload(lines: int, fixes: int) -> dict:
+    """Build a response payload shaped like DebugResponse"""
+    code = "\n".join(f"    value_{i} = compute(value_{i - 1}, {i})" for i in range(lines))
+    fix = {
+        "fixed_code": code,
+        "explanation": "Guard against the empty input before dividing. " * 20,
+        "confidence_score": 0.9,
+        "changes_summary": "Added an early return for empty lists",
+    }
+    return {
+        "success": True,
+        "fixed_code": code,
+        "explanation": fix["explanation"],
+        "is_fixed": True,
+        "iteration_count": fixes,
+        "identified_issues": ["ZeroDivisionError at line 5: empty list"],
+        "proposed_fixes": [dict(fix) for _ in range(fixes)],
+        "error_message": None,
+    }
+
+
+def project(payload: dict, fields: set) -> dict:
+    return {key: value for key, value in payload.items() if key in fields}
+
+
+def bench(label: str, func, number: int):
+    seconds = timeit.timeit(func, number=number) / number
+    body = func()
+    print(f"{label:<32} {seconds * 1e6:10.1f} us  {len(body):>10} B  gzip {len(gzip.compress(body)):>9} B")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2000, help="Lines of code in each fix")
+    parser.add_argument("--fixes", type=int, default=5, help="Number of proposed fixes")
+    parser.add_argument("--number", type=int, default=200, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    payload = make_payload(args.lines, args.fixes)
+    projected = project(payload, {"success", "fixed_code", "is_fixed"})
+
+    bench("json full", lambda: json.dumps(payload).encode(), args.number)
+    bench("orjson full", lambda: orjson.dumps(payload), args.number)
+    bench("json fields=fixed_code,is_fixed", lambda: json.dumps(projected).encode(), args.number)
+    bench("orjson fields=fixed_code,is_fixed", lambda: orjson.dumps(projected), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Throughput of the API under gunicorn with 1, 2, 4 and 8 workers.
+
+Starts `gunicorn -c gunicorn.conf.py` once per worker count, drives it from
+several client processes over keep-alive connections and prints requests per
+second. By default every request is a full POST /debug run answered by the
+replay LLM backend, so it exercises the workflow, the shared store (rate limit
+and tenant usage) and serialization without calling OpenAI.
+
+    PYTHONPATH=. python benchmarks/load_test.py --workers 1 2 4 8
+    PYTHONPATH=. python benchmarks/load_test.py --method GET --path / --body ""
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HOST = "127.0.0.1"
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def client(args) -> int:
+    port, method, path, body, duration = args
+    conn = http.client.HTTPConnection(HOST, port, timeout=30)
+    headers = {"Content-Type": "application/json"} if body else {}
+    deadline = time.monotonic() + duration
+    completed = 0
+    while time.monotonic() < deadline:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        # /debug reports workflow errors (e.g. a prompt missing from the replay file) in the body
+        if response.status == 200 and b'"success":false' not in data:
+            completed += 1
+    conn.close()
+    return completed
+
+
+def run(workers: int, port: int, clients: int, method: str, path: str, body, duration: float,
+        replay: str, rate_limit: int) -> float:
+    # A fresh shared store per run so counters from the previous run don't carry over
+    store = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"{HOST}:{port}",
+        LLM_BACKEND="replay",
+        LLM_REPLAY_PATH=replay,
+        SHARED_STORE_URL=store,
+        RATE_LIMIT_PER_MINUTE=str(rate_limit),
+        TENANT_DAILY_TOKEN_BUDGET="1000000000"
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "src.app.fastapi_app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port)
+        with multiprocessing.Pool(clients) as pool:
+            completed = sum(pool.map(client, [(port, method, path, body, duration)] * clients))
+        return completed / duration
+    finally:
+        server.terminate()
+        server.wait()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(store + suffix):
+                os.remove(store + suffix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--path", default="/debug")
+    parser.add_argument("--body", default=os.path.join(FIXTURES, "debug_request.json"),
+                        help="File with the JSON request body (empty for none)")
+    parser.add_argument("--replay", default=os.path.join(FIXTURES, "debug_replay.jsonl"),
+                        help="LLM replay file answering the request's prompts")
+    parser.add_argument("--rate-limit", type=int, default=10**9,
+                        help="RATE_LIMIT_PER_MINUTE for the server; high so every request hits the store but none is refused")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    body = open(args.body, "rb").read() if args.body else None
+    baseline = None
+    for workers in args.workers:
+        throughput = run(workers, args.port, args.clients, args.method, args.path, body, args.duration,
+                         args.replay, args.rate_limit)
+        baseline = baseline or throughput
+        print(f"{workers:2} workers: {throughput:9.1f} req/s  ({throughput / baseline:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Write an LLM replay file for a set of debug jobs without calling OpenAI.
+
+Each job in the input JSONL carries the model's answers under "responses",
+keyed by agent ("parser", "fixer", "reviewer"). The jobs are run through the
+workflow with a scripted model per agent and every prompt is recorded, so the
+output can be served with LLM_BACKEND=replay. Re-run it after changing a prompt.
+
+    PYTHONPATH=. python benchmarks/make_replay_fixture.py tests/fixtures/batch_jobs.jsonl -o tests/fixtures/replay.jsonl
+"""
+import argparse
+import json
+import os
+from types import SimpleNamespace
+
+from src.agents.llm_factory import RecordingLLM
+from src.workflow.debug_workflow import DebugWorkflow
+
+
+class ScriptedLLM:
+    """Answers every prompt with the same canned response"""
+
+    def __init__(self, response: dict, model: str):
+        self.content = json.dumps(response)
+        self.model_name = model
+
+    def invoke(self, messages, **kwargs):
+        return SimpleNamespace(content=self.content, usage_metadata=None, response_metadata={})
+
+
+def record_job(job: dict, path: str, model: str):
+    workflow = DebugWorkflow(model, api_key="unused")
+    responses = job["responses"]
+    slots = [("parser", workflow.parser_agent, "llm"), ("fixer", workflow.fixer_agent, "llm"),
+             ("reviewer", workflow.reviewer_agent, "llm"), ("reviewer", workflow.reviewer_agent, "cheap_llm")]
+    for name, agent, attribute in slots:
+        if name in responses:
+            setattr(agent, attribute, RecordingLLM(ScriptedLLM(responses[name], model), path))
+
+    result = workflow.debug_code(job["code"], job["error_log"], job.get("max_iterations", 3),
+                                 language=job.get("language"))
+    return result["status"].value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("jobs", help="JSONL file of jobs with canned responses")
+    parser.add_argument("-o", "--output", required=True, help="Replay file to write (overwritten)")
+    parser.add_argument("--model", default="gpt-4")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        os.remove(args.output)
+    with open(args.jobs, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                job = json.loads(line)
+                print(f"{job.get('id', '?')}: {record_job(job, args.output, args.model)}")
+
+
+if __name__ == "__main__":
+    main()
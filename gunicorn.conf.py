@@ -0,0 +1,16 @@
+# Multi-process deployment of the FastAPI app:
+#   gunicorn -c gunicorn.conf.py src.app.fastapi_app:app
+# Workers share caches, jobs and rate limits through SHARED_STORE_URL
+# and the near-duplicate fix index through FIX_INDEX_PATH.
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Debug runs are bounded by DEBUG_TIMEOUT_SECONDS; leave headroom on top
+timeout = int(float(os.getenv("DEBUG_TIMEOUT_SECONDS", "120"))) + 30
+graceful_timeout = 30
+keepalive = 5
+# Each worker opens its own SQLite connections, so don't fork after import
+preload_app = False
@@ -1,10 +1,14 @@
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 # from src.models.state import CodeFix, DebugStatus
-from src.models.schemas import CodeFix, DebugStatus
+from src.models.schemas import CodeFix, DebugStatus, IndexMatch
+from src.agents.iteration_memory import format_history, is_repeat, record_repeat
+from src.agents.llm_call import call_llm
+from src.agents.prompt_budget import chunk_budget, estimate_tokens, fits, implicated_chunk, split_code, stitch
+from src.agents.llm_factory import create_llm
+from src.languages.registry import get_plugin
 
 class CodeFixOutput(BaseModel):
     fixed_code: str = Field(description="The corrected code")
@@ -13,8 +17,11 @@ class CodeFixOutput(BaseModel):
     changes_summary: str = Field(description="Summary of changes made")
 
 class FixerAgent:
-    def __init__(self, llm_model: str = "gpt-4"):
-        self.llm = ChatOpenAI(model=llm_model, temperature=0.2)
+    def __init__(self, llm_model: str = "gpt-4", api_key: Optional[str] = None,
+                 use_history: bool = True):
+        self.llm = create_llm(llm_model, temperature=0.2, api_key=api_key)
+        # Feed rejected attempts back into the prompt; off only for benchmarking
+        self.use_history = use_history
         self.output_parser = PydanticOutputParser(pydantic_object=CodeFixOutput)
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -29,8 +36,8 @@ class FixerAgent:
             
             {format_instructions}"""),
             ("user", """
-            Original code:
-            ```
+            Original code{scope}:
+            ```{language}
             {original_code}
             ```
             
@@ -40,7 +47,7 @@ class FixerAgent:
             - Root Cause: {root_cause}
             - Severity: {severity}
             - Affected Lines: {affected_lines}
-            
+            {prior_fix}{previous_attempts}
             Please provide a fix for this code that addresses the identified error.
             """)
         ])
@@ -54,29 +61,64 @@ class FixerAgent:
             return state
         
         error_analysis = state["error_analysis"]
+        similar_fix = state.get("similar_fix")
         
-        # Format the prompt
-        formatted_prompt = self.prompt.format_messages(
-            original_code=state["original_code"],
-            error_type=error_analysis.error_type,
-            error_location=error_analysis.error_location,
-            root_cause=error_analysis.root_cause,
-            severity=error_analysis.severity,
-            affected_lines=error_analysis.affected_lines,
-            format_instructions=self.output_parser.get_format_instructions()
-        )
+        # The exact same code already has an approved fix for this error
+        if similar_fix and similar_fix.exact_code and state["iteration_count"] == 0:
+            prior = similar_fix.entry.code_fix
+            code_fix = CodeFix(
+                original_code=state["original_code"],
+                fixed_code=prior.fixed_code,
+                explanation=prior.explanation,
+                confidence_score=prior.confidence_score,
+                changes_summary=prior.changes_summary
+            )
+            state["current_fix"] = code_fix
+            state["proposed_fixes"].append(code_fix)
+            state["current_code"] = code_fix.fixed_code
+            state["status"] = DebugStatus.REVIEWING
+            state["reasoning_steps"].append("Fixer: Reused approved fix for identical code")
+            return state
+        
+        # The answer echoes the code back, so it has to fit twice
+        plugin = get_plugin(state["language"])
+        code = state["original_code"]
+        # An edited resubmission only re-fixes the region around the edit
+        chunk = state.get("focus")
+        if chunk is None:
+            formatted_prompt = self._format_prompt(state, code, "", plugin.fence)
+            if not fits(self.llm, formatted_prompt, estimate_tokens(code)):
+                chunks = split_code(code, chunk_budget(self.llm), plugin.split_points(code))
+                chunk = implicated_chunk(chunks, error_analysis.affected_lines)
+                if chunk is None:
+                    state["status"] = DebugStatus.FAILED
+                    state["reasoning_steps"].append("Fixer: Code too large for one prompt and no affected lines to narrow it down")
+                    return state
+                state["reasoning_steps"].append(f"Fixer: Code too large for one prompt, fixing lines {chunk.start_line}-{chunk.end_line}")
+        else:
+            state["reasoning_steps"].append(f"Fixer: Fixing the edited region, lines {chunk.start_line}-{chunk.end_line}")
+        
+        if chunk is not None:
+            total_lines = len(code.splitlines())
+            scope = f" (lines {chunk.start_line}-{chunk.end_line} of {total_lines}; return only these lines, fixed)"
+            formatted_prompt = self._format_prompt(state, chunk.code, scope, plugin.fence)
         
         # Get LLM response
-        response = self.llm.invoke(formatted_prompt)
+        response = call_llm(self.llm, formatted_prompt, state, "fixer")
         
         # Parse the output
         try:
             parsed_output = self.output_parser.parse(response.content)
+            fixed_code = stitch(code, chunk, parsed_output.fixed_code) if chunk else parsed_output.fixed_code
+            
+            # Don't spend a review on a fix that was already rejected
+            if self.use_history and is_repeat(state["iteration_history"], fixed_code):
+                return self._reject_repeat(state, fixed_code)
             
             # Create CodeFix object
             code_fix = CodeFix(
-                original_code=state["original_code"],
-                fixed_code=parsed_output.fixed_code,
+                original_code=code,
+                fixed_code=fixed_code,
                 explanation=parsed_output.explanation,
                 confidence_score=parsed_output.confidence_score,
                 changes_summary=parsed_output.changes_summary
@@ -85,7 +127,7 @@ class FixerAgent:
             # Update state
             state["current_fix"] = code_fix
             state["proposed_fixes"].append(code_fix)
-            state["current_code"] = parsed_output.fixed_code
+            state["current_code"] = fixed_code
             state["status"] = DebugStatus.REVIEWING
             state["reasoning_steps"].append(f"Fixer: Generated fix with {parsed_output.confidence_score:.2f} confidence")
             
@@ -94,3 +136,51 @@ class FixerAgent:
             state["reasoning_steps"].append(f"Fixer: Failed to generate fix - {str(e)}")
         
         return state
+    
+    def _format_prompt(self, state: Dict[str, Any], code: str, scope: str, language: str):
+        error_analysis = state["error_analysis"]
+        return self.prompt.format_messages(
+            original_code=code,
+            scope=scope,
+            language=language,
+            error_type=error_analysis.error_type,
+            error_location=error_analysis.error_location,
+            root_cause=error_analysis.root_cause,
+            severity=error_analysis.severity,
+            affected_lines=error_analysis.affected_lines,
+            prior_fix=self._format_prior_fix(state.get("similar_fix")),
+            previous_attempts=format_history(state["iteration_history"]) if self.use_history else "",
+            format_instructions=self.output_parser.get_format_instructions()
+        )
+    
+    def _reject_repeat(self, state: Dict[str, Any], fixed_code: str) -> Dict[str, Any]:
+        """Count a repeated fix as a rejected iteration without calling the reviewer"""
+        state["current_fix"] = CodeFix(
+            original_code=state["original_code"],
+            fixed_code=fixed_code,
+            explanation="",
+            confidence_score=0.0,
+            changes_summary=""
+        )
+        record_repeat(state, fixed_code)
+        state["iteration_count"] += 1
+        
+        if state["iteration_count"] >= state["max_iterations"]:
+            state["status"] = DebugStatus.FAILED
+            state["reasoning_steps"].append("Fixer: Repeated a rejected fix, max iterations reached")
+        else:
+            state["status"] = DebugStatus.FIXING
+            state["reasoning_steps"].append(f"Fixer: Repeated a rejected fix, retrying (iteration {state['iteration_count']})")
+        return state
+    
+    def _format_prior_fix(self, similar_fix: Optional[IndexMatch]) -> str:
+        """Describe a similar past fix as a hint for the prompt"""
+        if not similar_fix:
+            return ""
+        
+        prior = similar_fix.entry.code_fix
+        return f"""
+            A similar error in other code was fixed like this ({similar_fix.similarity:.0%} similar):
+            - Changes: {prior.changes_summary}
+            - Explanation: {prior.explanation}
+            """
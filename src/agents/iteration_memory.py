@@ -0,0 +1,72 @@
+import difflib
+import hashlib
+from typing import List
+from src.models.schemas import IterationRecord
+
+# Keep the history section of the fixer prompt small
+MAX_DIFF_CHARS = 1200
+MAX_OBJECTION_CHARS = 600
+MAX_RECORDS_IN_PROMPT = 3
+
+def fix_fingerprint(code: str) -> str:
+    """Hash the code ignoring trailing whitespace and blank lines"""
+    lines = [line.rstrip() for line in code.strip().splitlines() if line.strip()]
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+def compact_diff(original_code: str, fixed_code: str) -> str:
+    """Unified diff with one line of context, truncated for prompts"""
+    diff = "\n".join(
+        line for line in difflib.unified_diff(
+            original_code.splitlines(), fixed_code.splitlines(), lineterm="", n=1
+        )
+        if not line.startswith(("+++", "---"))
+    )
+    return _truncate(diff, MAX_DIFF_CHARS)
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "\n... (truncated)"
+
+def record_rejection(state: dict, objection: str):
+    """Append the current fix and the reason it was rejected to the history"""
+    current_fix = state["current_fix"]
+    state["iteration_history"].append(IterationRecord(
+        iteration=state["iteration_count"],
+        diff=compact_diff(current_fix.original_code, current_fix.fixed_code),
+        objection=_truncate(objection, MAX_OBJECTION_CHARS),
+        fix_hash=fix_fingerprint(current_fix.fixed_code)
+    ))
+
+def record_repeat(state: dict, fixed_code: str):
+    """Count a re-proposed fix on its original record instead of adding a new one.
+
+    The record moves to the end so its reviewer objection stays in the prompt.
+    """
+    history = state["iteration_history"]
+    fingerprint = fix_fingerprint(fixed_code)
+    for index, record in enumerate(history):
+        if record.fix_hash == fingerprint:
+            record.repeats += 1
+            history.append(history.pop(index))
+            return
+
+def is_repeat(history: List[IterationRecord], fixed_code: str) -> bool:
+    """Whether this fix is identical to one that was already rejected"""
+    fingerprint = fix_fingerprint(fixed_code)
+    return any(record.fix_hash == fingerprint for record in history)
+
+def format_history(history: List[IterationRecord]) -> str:
+    """Render the latest rejected attempts for the fixer prompt"""
+    if not history:
+        return ""
+    
+    attempts = []
+    for record in history[-MAX_RECORDS_IN_PROMPT:]:
+        repeated = f", then proposed again {record.repeats} more time(s)" if record.repeats else ""
+        attempts.append(
+            f"Attempt {record.iteration + 1} (rejected{repeated}):\n{record.diff or '(no changes)'}\n"
+            f"Reviewer objection: {record.objection}"
+        )
+    return (
+        "\nPrevious attempts were rejected. Do not repeat them; address the objections:\n"
+        + "\n\n".join(attempts) + "\n"
+    )
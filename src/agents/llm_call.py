@@ -0,0 +1,89 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+from src.agents.usage import record_abandoned, record_usage
+
+# How often a waiting LLM call checks for cancellation
+CANCEL_POLL_SECONDS = 0.1
+
+# LLM calls in flight per process, abandoned ones included until their provider
+# timeout fires. Each API request runs in one of the server's 40 threadpool
+# threads and may make a few calls at once (parallel chunks, speculation), so
+# a smaller pool would queue calls and spend their deadline waiting.
+LLM_CALL_THREADS = int(os.getenv("LLM_CALL_THREADS", "256"))
+
+_executor = ThreadPoolExecutor(max_workers=LLM_CALL_THREADS, thread_name_prefix="llm-call")
+
+class BudgetExhausted(Exception):
+    """The run's deadline passed or the client went away"""
+
+class DeadlineExceeded(BudgetExhausted):
+    pass
+
+class Cancelled(BudgetExhausted):
+    pass
+
+def remaining_time(state: Dict[str, Any]) -> Optional[float]:
+    """Seconds left before the run's deadline, or None without a deadline"""
+    deadline = state.get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+def check_budget(state: Dict[str, Any]):
+    """Raise if the run was cancelled or its deadline has passed"""
+    cancel_event = state.get("cancel_event")
+    if cancel_event is not None and cancel_event.is_set():
+        raise Cancelled("Client disconnected")
+    
+    remaining = remaining_time(state)
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Time budget exhausted")
+
+def call_llm(llm, messages, state: Dict[str, Any], node: str):
+    """Invoke the LLM within the run's time budget and record its token usage.
+
+    The request timeout is capped at the remaining budget. When the run has a
+    deadline or can be cancelled, the call is awaited in small steps and
+    abandoned as soon as either is hit, so provider retries cannot stretch the
+    run past its budget and the workflow stops without waiting for the provider.
+    """
+    response = _invoke(llm, messages, state, node)
+    record_usage(state, node, llm, response)
+    return response
+
+def _invoke(llm, messages, state: Dict[str, Any], node: str):
+    check_budget(state)
+    
+    remaining = remaining_time(state)
+    kwargs = {"timeout": remaining} if remaining is not None else {}
+    cancel_event = state.get("cancel_event")
+    if cancel_event is None and remaining is None:
+        return llm.invoke(messages, **kwargs)
+    
+    future = _executor.submit(llm.invoke, messages, **kwargs)
+    try:
+        return _wait(future, state, remaining)
+    except BudgetExhausted:
+        # The provider still processes (and bills) the prompt of an abandoned call
+        record_abandoned(state, node, llm, messages)
+        raise
+
+def _wait(future, state: Dict[str, Any], remaining: Optional[float]):
+    cancel_event = state.get("cancel_event")
+    while True:
+        try:
+            return future.result(timeout=CANCEL_POLL_SECONDS)
+        except FutureTimeout:
+            if cancel_event is not None and cancel_event.is_set():
+                future.cancel()
+                raise Cancelled("Client disconnected during LLM call")
+            check_budget(state)
+        except Exception as e:
+            # The provider's own timeout fires at the deadline; report it as such
+            if remaining is not None and (_is_timeout(e) or remaining_time(state) <= CANCEL_POLL_SECONDS):
+                raise DeadlineExceeded("Time budget exhausted during LLM call") from e
+            raise
+
+def _is_timeout(error: Exception) -> bool:
+    # openai.APITimeoutError and httpx timeouts do not subclass TimeoutError
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+def prompt_key(messages) -> str:
+    """Stable hash of a formatted prompt, used to match recorded responses"""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(getattr(message, "type", "").encode())
+        digest.update(b"\0")
+        digest.update(str(getattr(message, "content", message)).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class ReplayLLM:
+    """Offline chat model that answers prompts from a recorded JSONL file.
+
+    Each line is {"key": prompt_key(messages), "content": "..."}. Prompts
+    without a recording raise KeyError, so missing fixtures fail loudly.
+    """
+
+    def __init__(self, path: str, model: str = "replay"):
+        self.path = path
+        self.model_name = model
+        self.responses: Dict[str, str] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[record["key"]] = record["content"]
+    
+    def invoke(self, messages, **kwargs):
+        key = prompt_key(messages)
+        if key not in self.responses:
+            raise KeyError(f"No recorded response for prompt {key[:12]} in {self.path}")
+        return SimpleNamespace(content=self.responses[key], usage_metadata=None, response_metadata={})
+    
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
+
+class RecordingLLM:
+    """Wraps a real chat model and appends every response to a replay file"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, llm, path: str):
+        self.llm = llm
+        self.path = path
+    
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+    
+    def invoke(self, messages, **kwargs):
+        response = self.llm.invoke(messages, **kwargs)
+        record = {"key": prompt_key(messages), "content": response.content}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return response
+
+def create_llm(model: str, temperature: float, backend: Optional[str] = None,
+               api_key: Optional[str] = None):
+    """Create the chat model for an agent.
+
+    The backend comes from LLM_BACKEND unless given: "openai" (default),
+    "replay" to answer from LLM_REPLAY_PATH offline, or "record" to call
+    OpenAI and append responses to LLM_REPLAY_PATH. Without `api_key`
+    the OpenAI client reads OPENAI_API_KEY.
+    """
+    backend = backend or os.getenv("LLM_BACKEND", "openai")
+    replay_path = os.getenv("LLM_REPLAY_PATH", "llm_replay.jsonl")
+    
+    if backend == "replay":
+        return ReplayLLM(replay_path, model)
+    
+    from langchain_openai import ChatOpenAI
+    kwargs = {"api_key": api_key} if api_key else {}
+    llm = ChatOpenAI(model=model, temperature=temperature, **kwargs)
+    if backend == "record":
+        return RecordingLLM(llm, replay_path)
+    if backend != "openai":
+        raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+    return llm
@@ -0,0 +1,226 @@
+import io
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Rough size of a token for prompt budgeting
+CHARS_PER_TOKEN = 4
+
+TRACEBACK_START = "Traceback (most recent call last):"
+CHAIN_MARKERS = (
+    "During handling of the above exception, another exception occurred:",
+    "The above exception was the direct cause of the following exception:",
+)
+FRAME_RE = re.compile(r'^\s*File "[^"]*", line \d+')
+REPEATED_RE = re.compile(r"^\s*\[Previous line repeated (\d+) more times?\]")
+# CI runners prefix every line with a timestamp, e.g. "2024-05-01T12:00:00.1234567Z "
+# Only the one separating space is removed: the rest is the frame indentation
+TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?Z?\s")
+# Lines worth keeping from logs that contain no Python traceback
+ERROR_LINE_RE = re.compile(r"Error|Exception|FAILED|^E\s{2,}|Traceback")
+
+@dataclass
+class TracebackBlock:
+    frames: List[Tuple[str, ...]] = field(default_factory=list)
+    exception: List[str] = field(default_factory=list)
+
+    def render(self, max_frames: Optional[int] = None) -> List[str]:
+        lines = [TRACEBACK_START]
+        frames = collapse_repeats(self.frames)
+        if max_frames is not None and len(frames) > max_frames:
+            head = max(1, max_frames // 4)
+            tail = max_frames - head
+            omitted = len(frames) - head - tail
+            frames = frames[:head] + [(f"  ... {omitted} frames omitted ...",)] + frames[-tail:]
+        for frame in frames:
+            lines.extend(frame)
+        lines.extend(self.exception)
+        return lines
+
+@dataclass
+class CondensedLog:
+    text: str
+    original_chars: int
+    traceback_count: int
+    unique_tracebacks: int
+
+def collapse_repeats(frames: List[Tuple[str, ...]], max_period: int = 4) -> List[Tuple[str, ...]]:
+    """Collapse runs of repeated frame sequences (recursion) into one copy plus a marker"""
+    result = []
+    i = 0
+    while i < len(frames):
+        collapsed = False
+        for period in range(1, max_period + 1):
+            pattern = frames[i:i + period]
+            if len(pattern) < period:
+                break
+            reps = 1
+            while frames[i + reps * period:i + (reps + 1) * period] == pattern:
+                reps += 1
+            if reps >= 3:
+                result.extend(pattern)
+                result.append((f"  [Previous {period} frame(s) repeated {reps - 1} more times]",))
+                i += reps * period
+                collapsed = True
+                break
+        if not collapsed:
+            result.append(frames[i])
+            i += 1
+    return result
+
+def _iter_lines(log) -> Iterable[str]:
+    return io.StringIO(log) if isinstance(log, str) else log
+
+class LogCondenser:
+    """Condense huge error logs into the Python tracebacks that matter.
+
+    Works in a single pass over the lines: noise outside tracebacks is dropped,
+    recursive frames are collapsed, identical traceback chains are kept once
+    with a count, and the output is trimmed to `token_budget`, always keeping
+    the final exception chain.
+    """
+
+    def __init__(self, token_budget: int = 2000, max_error_lines: int = 50):
+        self.token_budget = token_budget
+        self.max_error_lines = max_error_lines
+    
+    @property
+    def char_budget(self) -> int:
+        return self.token_budget * CHARS_PER_TOKEN
+    
+    def condense(self, log) -> CondensedLog:
+        """Condense a log given as a string or any iterable of lines"""
+        # Chains of tracebacks keyed by their text, in first-seen order
+        chains: Dict[str, List] = {}
+        chain: List = []  # TracebackBlocks and chain markers
+        block: Optional[TracebackBlock] = None
+        in_exception = False
+        error_lines: Dict[str, None] = {}
+        original_chars = 0
+        traceback_count = 0
+        
+        def close_chain():
+            nonlocal chain
+            if chain:
+                key = "\n".join(
+                    "\n".join(part.render()) if isinstance(part, TracebackBlock) else part
+                    for part in chain
+                )
+                if key in chains:
+                    chains[key][1] += 1
+                    # Move to the end so the last seen chain stays last
+                    chains[key] = chains.pop(key)
+                else:
+                    chains[key] = [chain, 1]
+                chain = []
+        
+        for raw_line in _iter_lines(log):
+            original_chars += len(raw_line)
+            line = TIMESTAMP_RE.sub("", raw_line.rstrip("\r\n"))
+            stripped = line.strip()
+            
+            if stripped == TRACEBACK_START:
+                if block is not None:
+                    # Previous traceback ended right here, or was cut off without an exception line
+                    chain.append(block)
+                if chain and not isinstance(chain[-1], str):
+                    close_chain()
+                block = TracebackBlock()
+                in_exception = False
+                traceback_count += 1
+                continue
+            
+            if stripped in CHAIN_MARKERS and (block is None or in_exception):
+                if block is not None:
+                    chain.append(block)
+                    block = None
+                chain.append(stripped)
+                in_exception = False
+                continue
+            
+            if block is not None and not in_exception:
+                if FRAME_RE.match(line):
+                    block.frames.append((line,))
+                elif REPEATED_RE.match(line) and block.frames:
+                    block.frames.append((line,))
+                elif line.startswith(" ") and block.frames:
+                    # Source line or caret under the current frame
+                    if len(block.frames[-1]) < 3:
+                        block.frames[-1] = block.frames[-1] + (line,)
+                elif stripped:
+                    block.exception.append(line)
+                    in_exception = True
+                continue
+            
+            if block is not None and in_exception:
+                # Indented lines right after the exception continue its message
+                if stripped and line.startswith(" ") and len(block.exception) < 5:
+                    block.exception.append(line)
+                    continue
+                chain.append(block)
+                block = None
+                in_exception = False
+                if not stripped:
+                    continue
+            
+            if chain and not isinstance(chain[-1], str) and stripped:
+                close_chain()
+            if stripped and ERROR_LINE_RE.search(line):
+                error_lines[stripped] = None
+                if len(error_lines) > self.max_error_lines:
+                    # Keep the most recent error lines
+                    del error_lines[next(iter(error_lines))]
+        
+        if block is not None:
+            chain.append(block)
+        close_chain()
+        
+        text = self._render(list(chains.values()), list(error_lines))
+        return CondensedLog(
+            text=text,
+            original_chars=original_chars,
+            traceback_count=traceback_count,
+            unique_tracebacks=len(chains)
+        )
+    
+    def _render(self, chains: List, error_lines: List[str]) -> str:
+        if not chains:
+            return self._fit("\n".join(error_lines))
+        
+        def render_chain(parts, count, max_frames=None) -> str:
+            lines = []
+            for part in parts:
+                lines.extend(part.render(max_frames) if isinstance(part, TracebackBlock) else ["", part, ""])
+            if count > 1:
+                lines.append(f"[This traceback occurred {count} times in the log]")
+            return "\n".join(lines)
+        
+        # The final exception chain always survives, trimmed if it must be
+        final_parts, final_count = chains[-1]
+        final = render_chain(final_parts, final_count)
+        for max_frames in (40, 20, 10, 5):
+            if len(final) <= self.char_budget:
+                break
+            final = render_chain(final_parts, final_count, max_frames)
+        
+        # Earlier distinct tracebacks are added newest first while they fit
+        rendered = [final]
+        used = len(final)
+        dropped = 0
+        for parts, count in reversed(chains[:-1]):
+            text = render_chain(parts, count, max_frames=10)
+            if used + len(text) + 2 > self.char_budget:
+                dropped += 1
+                continue
+            rendered.append(text)
+            used += len(text) + 2
+        if dropped:
+            rendered.append(f"[{dropped} earlier distinct tracebacks omitted]")
+        
+        return self._fit("\n\n".join(reversed(rendered)))
+    
+    def _fit(self, text: str) -> str:
+        """Hard cap on size, keeping the end where the final exception is"""
+        if len(text) <= self.char_budget:
+            return text
+        return text[-self.char_budget:]
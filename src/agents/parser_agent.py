@@ -1,11 +1,16 @@
-import re
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 # from src.models.state import ErrorAnalysis, DebugStatus
-from src.models.schemas import ErrorAnalysis, DebugStatus
+from src.models.schemas import CodeChunk, ErrorAnalysis, DebugStatus
+from src.cache.fix_index import INDEXED_LANGUAGES, FixIndex
+from src.agents.llm_call import call_llm
+from src.agents.prompt_budget import chunk_budget, fits, split_code
+from src.agents.llm_factory import create_llm
+from src.languages.base import number_lines
+from src.languages.registry import get_plugin
 
 class ErrorAnalysisOutput(BaseModel):
     error_type: str = Field(description="Type of error (e.g., SyntaxError, TypeError, etc.)")
@@ -14,10 +19,25 @@ class ErrorAnalysisOutput(BaseModel):
     severity: str = Field(description="Error severity: low, medium, high, critical")
     affected_lines: list[int] = Field(description="List of line numbers affected by the error")
 
+class ChunkFindingOutput(ErrorAnalysisOutput):
+    implicated: bool = Field(description="Whether the error originates in this part of the code")
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
 class ParserAgent:
-    def __init__(self, llm_model: str = "gpt-4"):
-        self.llm = ChatOpenAI(model=llm_model, temperature=0.1)
+    def __init__(self, llm_model: str = "gpt-4", fix_index: Optional[FixIndex] = None,
+                 reuse_threshold: float = 0.9, excerpt_min_lines: int = 200,
+                 max_parallel_chunks: int = 4, api_key: Optional[str] = None):
+        self.llm = create_llm(llm_model, temperature=0.1, api_key=api_key)
+        self.fix_index = fix_index
+        # Near-hits at or above this similarity reuse the prior analysis without an LLM call
+        self.reuse_threshold = reuse_threshold
+        # Longer code is sent as an excerpt around the failing line
+        self.excerpt_min_lines = excerpt_min_lines
+        # Code too large for one prompt is analyzed in chunks, this many at a time
+        self.max_parallel_chunks = max_parallel_chunks
         self.output_parser = PydanticOutputParser(pydantic_object=ErrorAnalysisOutput)
+        self.chunk_parser = PydanticOutputParser(pydantic_object=ChunkFindingOutput)
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert code parser and error analyst. Your job is to:
@@ -31,7 +51,7 @@ class ParserAgent:
             {format_instructions}"""),
             ("user", """
             Code to analyze:
-            ```
+            ```{language}
             {code}
             ```
             
@@ -43,19 +63,52 @@ class ParserAgent:
             Please provide a comprehensive analysis of this error.
             """)
         ])
+        
+        self.chunk_prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are an expert code parser and error analyst. The code is too
+            large to review at once, so you are shown one part of it, with line numbers.
+            Decide whether the error originates in this part. If it does, identify the
+            root cause, severity and affected lines (using the numbers shown).
+            
+            {format_instructions}"""),
+            ("user", """
+            Lines {start_line}-{end_line} of {total_lines}:
+            ```{language}
+            {code}
+            ```
+            
+            Error log:
+            ```
+            {error_log}
+            ```
+            """)
+        ])
     
     def parse_error(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Parse and analyze the error from code and error log"""
         
+        # Look for a near-duplicate error that was already fixed
+        if self.fix_index and state["language"] in INDEXED_LANGUAGES:
+            match = self.fix_index.lookup(state["original_code"], state["error_log"])
+            if match:
+                state["similar_fix"] = match
+                state["reasoning_steps"].append(f"Parser: Found similar past fix ({match.similarity:.2f} similarity)")
+                if match.similarity >= self.reuse_threshold:
+                    return self._reuse_analysis(state, match.entry.error_analysis)
+        
         # Format the prompt
+        plugin = get_plugin(state["language"])
         formatted_prompt = self.prompt.format_messages(
-            code=state["original_code"],
+            code=self._code_for_prompt(state["original_code"], state["error_log"], plugin),
+            language=plugin.fence,
             error_log=state["error_log"],
             format_instructions=self.output_parser.get_format_instructions()
         )
+        if not fits(self.llm, formatted_prompt):
+            return self._analyze_chunks(state, plugin)
         
         # Get LLM response
-        response = self.llm.invoke(formatted_prompt)
+        response = call_llm(self.llm, formatted_prompt, state, "parser")
         
         # Parse the output
         try:
@@ -79,4 +132,99 @@ class ParserAgent:
             state["status"] = DebugStatus.FAILED
             state["reasoning_steps"].append(f"Parser: Failed to parse error - {str(e)}")
         
-        return state
\ No newline at end of file
+        return state
+    
+    def _analyze_chunks(self, state: Dict[str, Any], plugin) -> Dict[str, Any]:
+        """Analyze oversized code chunk by chunk in parallel and merge the findings"""
+        code = state["original_code"]
+        chunks = split_code(code, chunk_budget(self.llm), plugin.split_points(code))
+        state["reasoning_steps"].append(f"Parser: Code too large for one prompt, analyzing {len(chunks)} chunks")
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_parallel_chunks, len(chunks))) as pool:
+            findings = list(pool.map(lambda chunk: self._analyze_chunk(state, chunk, plugin), chunks))
+        
+        error_analysis = self._merge_findings([finding for finding in findings if finding])
+        if error_analysis is None:
+            state["status"] = DebugStatus.FAILED
+            state["reasoning_steps"].append("Parser: No chunk of the code was implicated by the error")
+            return state
+        
+        state["error_analysis"] = error_analysis
+        state["status"] = DebugStatus.FIXING
+        state["reasoning_steps"].append(f"Parser: Identified {error_analysis.error_type} at {error_analysis.error_location}")
+        return state
+    
+    def _analyze_chunk(self, state: Dict[str, Any], chunk: CodeChunk, plugin) -> Optional[ChunkFindingOutput]:
+        formatted_prompt = self.chunk_prompt.format_messages(
+            code=number_lines(chunk.code.splitlines(), chunk.start_line),
+            language=plugin.fence,
+            start_line=chunk.start_line,
+            end_line=chunk.end_line,
+            total_lines=len(state["original_code"].splitlines()),
+            error_log=state["error_log"],
+            format_instructions=self.chunk_parser.get_format_instructions()
+        )
+        response = call_llm(self.llm, formatted_prompt, state, "parser")
+        try:
+            return self.chunk_parser.parse(response.content)
+        except Exception:
+            # One unreadable chunk should not sink the whole analysis
+            return None
+    
+    def _merge_findings(self, findings: List[ChunkFindingOutput]) -> Optional[ErrorAnalysis]:
+        """Combine the implicated chunks into one analysis led by the most severe finding"""
+        implicated = [finding for finding in findings if finding.implicated]
+        if not implicated:
+            return None
+        
+        lead = max(implicated, key=lambda finding: SEVERITY_RANK.get(finding.severity.lower(), 1))
+        root_causes = list(dict.fromkeys(finding.root_cause for finding in [lead] + implicated))
+        return ErrorAnalysis(
+            error_type=lead.error_type,
+            error_location=lead.error_location,
+            root_cause=" ".join(root_causes),
+            severity=lead.severity,
+            affected_lines=sorted({line for finding in implicated for line in finding.affected_lines})
+        )
+    
+    def _reuse_analysis(self, state: Dict[str, Any], prior: ErrorAnalysis) -> Dict[str, Any]:
+        """Adopt a prior analysis, relocated to this traceback"""
+        traceback = get_plugin(state["language"]).parse_traceback(state["error_log"])
+        line_number = traceback.line_number if traceback else None
+        
+        error_analysis = ErrorAnalysis(
+            error_type=prior.error_type,
+            error_location=f"line {line_number}" if line_number else prior.error_location,
+            root_cause=prior.root_cause,
+            severity=prior.severity,
+            affected_lines=[line_number] if line_number else prior.affected_lines
+        )
+        
+        state["error_analysis"] = error_analysis
+        state["status"] = DebugStatus.FIXING
+        state["reasoning_steps"].append(f"Parser: Reused analysis of {error_analysis.error_type} at {error_analysis.error_location}")
+        return state
+    
+    def _code_for_prompt(self, code: str, error_log: str, plugin) -> str:
+        """The full code, or for long code the part around the failing line"""
+        if code.count("\n") < self.excerpt_min_lines:
+            return code
+        traceback = plugin.parse_traceback(error_log)
+        if traceback is None or traceback.line_number is None:
+            return code
+        return plugin.extract_context(code, traceback.line_number)
+    
+    def quick_analysis(self, error_log: str, language: str = "python") -> Optional[ErrorAnalysis]:
+        """Provisional analysis read directly off the traceback, without an LLM call"""
+        traceback = get_plugin(language).parse_traceback(error_log)
+        if traceback is None:
+            return None
+        
+        line_number = traceback.line_number
+        return ErrorAnalysis(
+            error_type=traceback.error_type,
+            error_location=f"line {line_number}" if line_number else "unknown",
+            root_cause=f"{traceback.error_type}: {traceback.message}" if traceback.message else traceback.error_type,
+            severity="medium",
+            affected_lines=[line_number] if line_number else []
+        )
@@ -0,0 +1,119 @@
+import difflib
+from typing import Iterable, List, Optional, Tuple
+from src.agents.log_condenser import CHARS_PER_TOKEN
+from src.languages.base import number_lines
+from src.models.schemas import CodeChunk
+
+# Context window in tokens (prompt + completion)
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+# Room kept for the answer on top of any code the model has to echo back
+OUTPUT_RESERVE_TOKENS = 1000
+# Lines of unchanged code shown around a change when the full code does not fit
+CHANGE_CONTEXT_LINES = 10
+
+def estimate_tokens(messages) -> int:
+    """Rough token count of a prompt (a string or a list of chat messages)"""
+    if isinstance(messages, str):
+        return len(messages) // CHARS_PER_TOKEN + 1
+    return sum(estimate_tokens(str(getattr(message, "content", message))) for message in messages)
+
+def context_window(llm) -> int:
+    model = getattr(llm, "model_name", "") or ""
+    return MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+def fits(llm, messages, output_tokens: int = 0) -> bool:
+    """Whether the prompt and an answer of `output_tokens` fit the model's context"""
+    return estimate_tokens(messages) + output_tokens + OUTPUT_RESERVE_TOKENS <= context_window(llm)
+
+def chunk_budget(llm) -> int:
+    """Token size of a code chunk.
+
+    A chunk appears in the prompt and, for the fixer, again in the answer;
+    the remaining third leaves room for instructions and the error log.
+    """
+    return (context_window(llm) - OUTPUT_RESERVE_TOKENS) // 3
+
+def split_code(code: str, max_tokens: int, split_points: Iterable[int]) -> List[CodeChunk]:
+    """Pack the code into chunks of at most `max_tokens`, cutting only at `split_points`
+
+    Split points are 1-based line numbers where a new definition starts. A single
+    definition larger than the budget is cut into line windows.
+    """
+    lines = code.splitlines(keepends=True)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    starts = sorted({1, *(line for line in split_points if 1 < line <= len(lines))})
+    segments = [(start, end - 1) for start, end in zip(starts, starts[1:] + [len(lines) + 1])]
+    
+    chunks: List[CodeChunk] = []
+    first = last = None
+    size = 0
+    for start, end in segments:
+        segment_size = sum(len(line) for line in lines[start - 1:end])
+        if first is not None and size + segment_size > max_chars:
+            chunks.append(_chunk(lines, first, last))
+            first = None
+        if segment_size > max_chars:
+            chunks.extend(_windows(lines, start, end, max_chars))
+            continue
+        if first is None:
+            first, size = start, 0
+        last = end
+        size += segment_size
+    if first is not None:
+        chunks.append(_chunk(lines, first, last))
+    return chunks
+
+def _chunk(lines: List[str], start: int, end: int) -> CodeChunk:
+    return CodeChunk(start_line=start, end_line=end, code="".join(lines[start - 1:end]))
+
+def _windows(lines: List[str], start: int, end: int, max_chars: int) -> Iterable[CodeChunk]:
+    first, size = start, 0
+    for number in range(start, end + 1):
+        length = len(lines[number - 1])
+        if size and size + length > max_chars:
+            yield _chunk(lines, first, number - 1)
+            first, size = number, 0
+        size += length
+    yield _chunk(lines, first, end)
+
+def implicated_chunk(chunks: List[CodeChunk], affected_lines: List[int]) -> Optional[CodeChunk]:
+    """The chunk containing most of the affected lines (the first of them on a tie)"""
+    best, best_count = None, 0
+    for chunk in chunks:
+        count = sum(chunk.start_line <= line <= chunk.end_line for line in affected_lines)
+        if count > best_count:
+            best, best_count = chunk, count
+    return best
+
+def stitch(code: str, chunk: CodeChunk, fixed_chunk: str) -> str:
+    """Replace the chunk's lines in the full code with the fixed version"""
+    lines = code.splitlines(keepends=True)
+    # Models tend to drop trailing blank lines; keep the chunk's own
+    trailing = chunk.code[len(chunk.code.rstrip("\n")):]
+    fixed_chunk = fixed_chunk.rstrip("\n") + (trailing or ("\n" if chunk.end_line < len(lines) else ""))
+    return "".join(lines[:chunk.start_line - 1]) + fixed_chunk + "".join(lines[chunk.end_line:])
+
+def focus_on_change(original_code: str, fixed_code: str,
+                    context_lines: int = CHANGE_CONTEXT_LINES) -> Tuple[str, str]:
+    """Numbered excerpts of the original and fixed code around the changed lines"""
+    original, fixed = original_code.splitlines(), fixed_code.splitlines()
+    changes = [op for op in difflib.SequenceMatcher(None, original, fixed, autojunk=False).get_opcodes()
+               if op[0] != "equal"]
+    if not changes:
+        return original_code, fixed_code
+    
+    before = min(context_lines, changes[0][1], changes[0][3])
+    after = min(context_lines, len(original) - changes[-1][2], len(fixed) - changes[-1][4])
+    original_start, fixed_start = changes[0][1] - before, changes[0][3] - before
+    return (
+        number_lines(original[original_start:changes[-1][2] + after], original_start + 1),
+        number_lines(fixed[fixed_start:changes[-1][4] + after], fixed_start + 1)
+    )
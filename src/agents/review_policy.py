@@ -0,0 +1,84 @@
+import difflib
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from src.models.schemas import CodeFix, ErrorAnalysis, ReviewDecision
+from src.languages.base import LanguagePlugin
+
+# Errors where "it compiles now" is strong evidence the fix is right
+SYNTAX_ERROR_TYPES = ("SyntaxError", "IndentationError", "TabError")
+
+def count_changed_lines(original_code: str, fixed_code: str) -> int:
+    """Count lines touched by the fix (a replaced line counts once)"""
+    added = removed = 0
+    diff = difflib.unified_diff(
+        original_code.splitlines(), fixed_code.splitlines(), lineterm="", n=0
+    )
+    for line in diff:
+        if line.startswith(("+++", "---")):
+            continue
+        if line.startswith("+"):
+            added += 1
+        elif line.startswith("-"):
+            removed += 1
+    return max(added, removed)
+
+def compiles(code: str) -> bool:
+    """Check whether the code is valid Python without running it"""
+    try:
+        compile(code, "<fix>", "exec")
+        return True
+    except (SyntaxError, ValueError):
+        return False
+
+@dataclass(frozen=True)
+class ApprovalPolicy:
+    """Decide how much review a fix needs before the reviewer LLM is called.
+
+    - "skip": approve without an LLM call
+    - "cheap": review with the cheap reviewer model
+    - "full": review with the main model
+    """
+    skip_min_confidence: float = 0.95
+    cheap_min_confidence: float = 0.8
+    max_changed_lines: int = 3
+    syntax_error_types: Tuple[str, ...] = SYNTAX_ERROR_TYPES
+    require_compile: bool = True
+
+    def decide(self, fix: CodeFix, error_analysis: ErrorAnalysis,
+               plugin: Optional[LanguagePlugin] = None) -> ReviewDecision:
+        """Pick a review action for the fix from local evidence
+
+        `plugin` checks syntax for non-Python code; None means Python.
+        """
+        check_syntax = plugin.check_syntax if plugin else compiles
+        changed_lines = count_changed_lines(fix.original_code, fix.fixed_code)
+        fix_compiles: Optional[bool] = check_syntax(fix.fixed_code) if self.require_compile else None
+        confidence = fix.confidence_score
+        small_change = 0 < changed_lines <= self.max_changed_lines
+        
+        def decision(action: str, reason: str) -> ReviewDecision:
+            return ReviewDecision(
+                action=action,
+                reason=reason,
+                confidence_score=confidence,
+                changed_lines=changed_lines,
+                compiles=fix_compiles
+            )
+        
+        if changed_lines == 0:
+            return decision("full", "fix does not change the code")
+        if fix_compiles is False:
+            return decision("full", "fixed code does not compile")
+        
+        is_syntax_error = error_analysis.error_type in self.syntax_error_types
+        if (is_syntax_error and small_change and fix_compiles is True
+                and check_syntax(fix.original_code) is False
+                and confidence >= self.cheap_min_confidence):
+            return decision("skip", f"{error_analysis.error_type} fixed by a {changed_lines}-line change that now compiles")
+        # Without a syntax check for the language there is no local evidence to skip on
+        verified = fix_compiles is True or not self.require_compile
+        if small_change and verified and confidence >= self.skip_min_confidence:
+            return decision("skip", f"{changed_lines}-line change with {confidence:.2f} confidence")
+        if confidence >= self.cheap_min_confidence:
+            return decision("cheap", f"{confidence:.2f} confidence, {changed_lines} lines changed")
+        return decision("full", f"{confidence:.2f} confidence, {changed_lines} lines changed")
@@ -1,10 +1,15 @@
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 # from src.models.state import DebugStatus
 from src.models.schemas import  DebugStatus
+from src.agents.review_policy import ApprovalPolicy
+from src.languages.registry import get_plugin
+from src.agents.iteration_memory import record_rejection
+from src.agents.llm_call import call_llm
+from src.agents.prompt_budget import fits, focus_on_change
+from src.agents.llm_factory import create_llm
 
 class ReviewOutput(BaseModel):
     is_fix_valid: bool = Field(description="Whether the fix is valid and addresses the error")
@@ -13,8 +18,11 @@ class ReviewOutput(BaseModel):
     suggestions: str = Field(description="Additional suggestions or improvements")
 
 class ReviewerAgent:
-    def __init__(self, llm_model: str = "gpt-4"):
-        self.llm = ChatOpenAI(model=llm_model, temperature=0.1)
+    def __init__(self, llm_model: str = "gpt-4", cheap_llm_model: Optional[str] = None,
+                 approval_policy: Optional[ApprovalPolicy] = None, api_key: Optional[str] = None):
+        self.llm = create_llm(llm_model, temperature=0.1, api_key=api_key)
+        self.cheap_llm = create_llm(cheap_llm_model, temperature=0.1, api_key=api_key) if cheap_llm_model else None
+        self.approval_policy = approval_policy
         self.output_parser = PydanticOutputParser(pydantic_object=ReviewOutput)
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -61,46 +69,75 @@ class ReviewerAgent:
         
         current_fix = state["current_fix"]
         error_analysis = state["error_analysis"]
+        llm = self.llm
+        
+        # Let the approval policy skip or downgrade the review
+        if self.approval_policy:
+            decision = self.approval_policy.decide(current_fix, error_analysis, get_plugin(state["language"]))
+            state["review_decisions"].append(decision)
+            state["reasoning_steps"].append(f"Reviewer: Policy chose {decision.action} review ({decision.reason})")
+            
+            if decision.action == "skip":
+                state["llm_calls_saved"] += 1
+                return self._apply_verdict(state, True, f"Approved by policy: {decision.reason}")
+            if decision.action == "cheap" and self.cheap_llm:
+                llm = self.cheap_llm
         
         # Format the prompt
-        formatted_prompt = self.prompt.format_messages(
-            original_code=current_fix.original_code,
-            error_log=state["error_log"],
-            fixed_code=current_fix.fixed_code,
-            fix_explanation=current_fix.explanation,
-            error_type=error_analysis.error_type,
-            root_cause=error_analysis.root_cause,
-            format_instructions=self.output_parser.get_format_instructions()
-        )
+        formatted_prompt = self._format_prompt(state, current_fix.original_code, current_fix.fixed_code)
+        if state.get("focus") or not fits(llm, formatted_prompt):
+            # Review only the changed region of an edited resubmission or of code too large for one prompt
+            original_excerpt, fixed_excerpt = focus_on_change(current_fix.original_code, current_fix.fixed_code)
+            formatted_prompt = self._format_prompt(state, original_excerpt, fixed_excerpt)
+            state["reasoning_steps"].append("Reviewer: Reviewing the changed lines only")
         
         # Get LLM response
-        response = self.llm.invoke(formatted_prompt)
+        response = call_llm(llm, formatted_prompt, state, "reviewer")
         
         # Parse the output
         try:
             parsed_output = self.output_parser.parse(response.content)
-            
-            # Update state based on review
-            state["review_feedback"] = parsed_output.review_feedback
-            state["reasoning_steps"].append(f"Reviewer: {'Approved' if parsed_output.is_fix_valid else 'Rejected'} fix")
-            
-            if parsed_output.is_fix_valid:
-                state["status"] = DebugStatus.COMPLETED
-                state["final_result"] = current_fix
-                state["reasoning_steps"].append("Reviewer: Fix approved - debugging complete")
-            else:
-                state["iteration_count"] += 1
-                if state["iteration_count"] >= state["max_iterations"]:
-                    state["status"] = DebugStatus.FAILED
-                    state["reasoning_steps"].append("Reviewer: Max iterations reached")
-                else:
-                    state["status"] = DebugStatus.FIXING
-                    state["reasoning_steps"].append(f"Reviewer: Fix rejected, iteration {state['iteration_count']}")
-                    # Add feedback to help the next fix attempt
-                    state["reasoning_steps"].append(f"Feedback: {parsed_output.review_feedback}")
+            self._apply_verdict(state, parsed_output.is_fix_valid, parsed_output.review_feedback)
                     
         except Exception as e:
             state["status"] = DebugStatus.FAILED
             state["reasoning_steps"].append(f"Reviewer: Failed to review fix - {str(e)}")
         
+        return state
+    
+    def _format_prompt(self, state: Dict[str, Any], original_code: str, fixed_code: str):
+        current_fix = state["current_fix"]
+        error_analysis = state["error_analysis"]
+        return self.prompt.format_messages(
+            original_code=original_code,
+            error_log=state["error_log"],
+            fixed_code=fixed_code,
+            fix_explanation=current_fix.explanation,
+            error_type=error_analysis.error_type,
+            root_cause=error_analysis.root_cause,
+            format_instructions=self.output_parser.get_format_instructions()
+        )
+    
+    def _apply_verdict(self, state: Dict[str, Any], is_fix_valid: bool, review_feedback: str) -> Dict[str, Any]:
+        """Update state based on review"""
+        state["review_feedback"] = review_feedback
+        state["reasoning_steps"].append(f"Reviewer: {'Approved' if is_fix_valid else 'Rejected'} fix")
+        
+        if is_fix_valid:
+            state["status"] = DebugStatus.COMPLETED
+            state["final_result"] = state["current_fix"]
+            state["reasoning_steps"].append("Reviewer: Fix approved - debugging complete")
+        else:
+            # Remember what was tried so the next attempt does not start cold
+            record_rejection(state, review_feedback)
+            state["iteration_count"] += 1
+            if state["iteration_count"] >= state["max_iterations"]:
+                state["status"] = DebugStatus.FAILED
+                state["reasoning_steps"].append("Reviewer: Max iterations reached")
+            else:
+                state["status"] = DebugStatus.FIXING
+                state["reasoning_steps"].append(f"Reviewer: Fix rejected, iteration {state['iteration_count']}")
+                # Add feedback to help the next fix attempt
+                state["reasoning_steps"].append(f"Feedback: {review_feedback}")
+        
         return state
\ No newline at end of file
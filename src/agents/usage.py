@@ -0,0 +1,57 @@
+import threading
+from typing import Any, Dict, Tuple
+from src.models.schemas import TokenUsage
+from src.agents.prompt_budget import estimate_tokens
+
+# USD per million (input, output) tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+# Chunked analysis and speculative fixes record usage from worker threads
+_lock = threading.Lock()
+
+def response_tokens(response) -> Tuple[int, int]:
+    """Input and output token counts reported with an LLM response"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    
+    # Older langchain versions only fill response_metadata
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+def record_usage(state: Dict[str, Any], node: str, llm, response):
+    """Add the tokens of one LLM call to the run's per-node usage"""
+    input_tokens, output_tokens = response_tokens(response)
+    _add_usage(state, node, llm, input_tokens, output_tokens)
+
+def record_abandoned(state: Dict[str, Any], node: str, llm, messages):
+    """Count a call abandoned in flight, with its estimated prompt tokens (the output is unknown)"""
+    _add_usage(state, node, llm, estimate_tokens(messages), 0)
+
+def _add_usage(state: Dict[str, Any], node: str, llm, input_tokens: int, output_tokens: int):
+    model = getattr(llm, "model_name", "") or ""
+    with _lock:
+        usage = state["token_usage"].setdefault(node, TokenUsage())
+        usage.calls += 1
+        usage.input_tokens += input_tokens
+        usage.output_tokens += output_tokens
+        usage.cost_usd += estimate_cost(model, input_tokens, output_tokens)
+
+def total_usage(state: Dict[str, Any]) -> TokenUsage:
+    """Sum the per-node usage of a run"""
+    total = TokenUsage()
+    for usage in state.get("token_usage", {}).values():
+        total.calls += usage.calls
+        total.input_tokens += usage.input_tokens
+        total.output_tokens += usage.output_tokens
+        total.cost_usd += usage.cost_usd
+    return total
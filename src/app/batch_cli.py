@@ -0,0 +1,175 @@
+"""Debug a batch of failures offline and stream the results to JSONL.
+
+Input is a JSONL file with one {"id", "code", "error_log"} object per line
+(optionally with "language"),
+or a directory of <name>.<ext> source files with a matching <name>.log.
+
+    python -m src.app.batch_cli failures.jsonl -o results.jsonl --workers 8
+    LLM_BACKEND=replay LLM_REPLAY_PATH=fixtures.jsonl python -m src.app.batch_cli failures/ -o out.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, Set
+
+from dotenv import load_dotenv
+
+LOG_SUFFIXES = (".log", ".txt")
+
+# One workflow per worker process, created by the pool initializer
+_workflow = None
+_settings: Dict[str, Any] = {}
+
+def iter_jobs(source: str) -> Iterator[Dict[str, Any]]:
+    """Yield jobs from a JSONL file or a directory of (code, log) pairs"""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            stem, ext = os.path.splitext(name)
+            if ext in LOG_SUFFIXES or name.startswith("."):
+                continue
+            for suffix in LOG_SUFFIXES:
+                log_path = os.path.join(source, stem + suffix)
+                if os.path.exists(log_path):
+                    with open(os.path.join(source, name), encoding="utf-8") as f:
+                        code = f.read()
+                    with open(log_path, encoding="utf-8", errors="replace") as f:
+                        error_log = f.read()
+                    yield {"id": name, "code": code, "error_log": error_log}
+                    break
+    else:
+        with open(source, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    job = json.loads(line)
+                    job.setdefault("id", str(line_number))
+                    yield job
+
+def completed_ids(output: str) -> Set[str]:
+    """Ids already present in the output file, for --resume"""
+    if not os.path.exists(output):
+        return set()
+    done = set()
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError):
+                continue
+    return done
+
+def init_worker(settings: Dict[str, Any]):
+    global _workflow, _settings
+    from src.workflow.debug_workflow import DebugWorkflow
+    _settings = settings
+    _workflow = DebugWorkflow(settings["model"])
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Debug one job in a worker process and return a JSON-safe record"""
+    started = time.monotonic()
+    record = {"id": job["id"]}
+    try:
+        result = _workflow.debug_code(
+            job["code"],
+            job["error_log"],
+            job.get("max_iterations", _settings["max_iterations"]),
+            timeout=_settings["timeout"],
+            language=job.get("language")
+        )
+        fix = result.get("final_result") or result.get("best_fix")
+        analysis = result.get("error_analysis")
+        record.update(
+            status=result["status"].value,
+            is_fixed=result.get("final_result") is not None,
+            fixed_code=fix.fixed_code if fix else None,
+            explanation=fix.explanation if fix else None,
+            confidence_score=fix.confidence_score if fix else None,
+            error_type=analysis.error_type if analysis else None,
+            root_cause=analysis.root_cause if analysis else None,
+            iteration_count=result.get("iteration_count", 0),
+            review_decisions=[asdict(decision) for decision in result.get("review_decisions", [])],
+            llm_calls_saved=result.get("llm_calls_saved", 0),
+            reasoning_steps=result.get("reasoning_steps", [])
+        )
+    except Exception as e:
+        record.update(status="error", is_fixed=False, error_message=str(e))
+    record["seconds"] = round(time.monotonic() - started, 3)
+    return record
+
+def report_progress(done: int, fixed: int, started: float, total: int):
+    elapsed = time.monotonic() - started
+    rate = done / elapsed if elapsed else 0.0
+    eta = f", eta {max(0, total - done) / rate:.0f}s" if rate else ""
+    print(f"\r[{done}/{total}] {fixed} fixed, {rate:.2f} jobs/s{eta}", end="", file=sys.stderr, flush=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="JSONL file or directory of <name>.<ext> + <name>.log pairs")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--max-in-flight", type=int, help="Jobs submitted at once (default: 2 x workers)")
+    parser.add_argument("--offset", type=int, default=0, help="Skip the first N jobs")
+    parser.add_argument("--resume", action="store_true", help="Skip jobs whose id is already in the output")
+    parser.add_argument("--model", default=os.getenv("DEFAULT_MODEL", "gpt-4"))
+    parser.add_argument("--max-iterations", type=int, default=int(os.getenv("MAX_ITERATIONS", "3")))
+    parser.add_argument("--timeout", type=float, help="Time budget per job in seconds")
+    parser.add_argument("--llm-backend", choices=["openai", "replay", "record"], help="Overrides LLM_BACKEND")
+    parser.add_argument("--replay-file", help="Overrides LLM_REPLAY_PATH")
+    args = parser.parse_args(argv)
+    
+    load_dotenv()
+    # Worker processes inherit the environment
+    if args.llm_backend:
+        os.environ["LLM_BACKEND"] = args.llm_backend
+    if args.replay_file:
+        os.environ["LLM_REPLAY_PATH"] = args.replay_file
+    
+    skip_ids = completed_ids(args.output) if args.resume else set()
+    
+    def select_jobs():
+        return (
+            job for index, job in enumerate(iter_jobs(args.source))
+            if index >= args.offset and str(job["id"]) not in skip_ids
+        )
+    
+    # One extra pass over the input gives an ETA; jobs are then streamed
+    total = sum(1 for _ in select_jobs())
+    jobs = select_jobs()
+    
+    settings = {"model": args.model, "max_iterations": args.max_iterations, "timeout": args.timeout}
+    max_in_flight = args.max_in_flight or 2 * args.workers
+    done = fixed = 0
+    started = time.monotonic()
+    
+    with open(args.output, "a", encoding="utf-8") as output, \
+            ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(settings,)) as pool:
+        
+        def collect(futures):
+            nonlocal done, fixed
+            for future in futures:
+                record = future.result()
+                output.write(json.dumps(record) + "\n")
+                done += 1
+                fixed += record["is_fixed"]
+            output.flush()
+            report_progress(done, fixed, started, total)
+        
+        # Keep at most max_in_flight jobs queued so large inputs stream through
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(run_job, job))
+            if len(pending) >= max_in_flight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(wait(pending).done)
+    
+    elapsed = time.monotonic() - started
+    print(f"\nProcessed {done} jobs in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.2f} jobs/s), {fixed} fixed",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
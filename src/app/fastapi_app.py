@@ -1,5 +1,11 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import threading
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
@@ -7,10 +13,52 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.workflow.debug_workflow import DebugWorkflow
+from src.models.schemas import DebugStatus
+from src.cache.fix_index import FixIndex
+from src.cache.shared_store import JobStore, RateLimiter, open_store
+from src.cache.tenant_usage import TenantUsage
+from src.agents.usage import total_usage
 
 load_dotenv()
 
-app = FastAPI(title="AI Code Debugger API", version="1.0.0")
+# Wall-clock budget for one /debug request, in seconds
+DEBUG_TIMEOUT_SECONDS = float(os.getenv("DEBUG_TIMEOUT_SECONDS", "120"))
+# How often a running request checks whether the client went away
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Responses smaller than this are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+
+# Shared near-duplicate fix index, enabled by setting FIX_INDEX_PATH
+FIX_INDEX_PATH = os.getenv("FIX_INDEX_PATH")
+fix_index = FixIndex(FIX_INDEX_PATH) if FIX_INDEX_PATH else None
+
+# State shared by all worker processes: a SQLite file or a redis:// URL
+SHARED_STORE_URL = os.getenv("SHARED_STORE_URL", "debugger_state.db")
+# Requests per minute per API key, 0 disables the limit
+RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "0"))
+
+# Tokens per API key per day, 0 disables the budget
+TENANT_DAILY_TOKEN_BUDGET = int(os.getenv("TENANT_DAILY_TOKEN_BUDGET", "0"))
+# What happens over budget: "reject" or "downgrade" to DOWNGRADE_MODEL
+TENANT_OVER_BUDGET = os.getenv("TENANT_OVER_BUDGET", "reject")
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gpt-4")
+DOWNGRADE_MODEL = os.getenv("DOWNGRADE_MODEL", "gpt-4o-mini")
+
+shared_store = open_store(SHARED_STORE_URL)
+# Runs are bounded by DEBUG_TIMEOUT_SECONDS, so a job silent for much longer lost its worker
+JOB_STALE_SECONDS = DEBUG_TIMEOUT_SECONDS + float(os.getenv("JOB_STALE_GRACE_SECONDS", "60"))
+job_store = JobStore(shared_store, stale_after=JOB_STALE_SECONDS)
+rate_limiter = RateLimiter(shared_store, RATE_LIMIT_PER_MINUTE) if RATE_LIMIT_PER_MINUTE > 0 else None
+tenant_usage = TenantUsage(shared_store)
+# Keep references to running jobs so they are not garbage collected
+background_jobs = set()
+
+app = FastAPI(
+    title="AI Code Debugger API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,55 +67,247 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+@app.on_event("startup")
+def start_tenant_usage():
+    # Started per worker: a flush thread from before a fork would not survive it
+    tenant_usage.start()
+
+@app.on_event("shutdown")
+def flush_tenant_usage():
+    tenant_usage.close()
 
 class DebugRequest(BaseModel):
     code: str
     error_log: str
     max_iterations: int = 3
     api_key: str
+    timeout_seconds: Optional[float] = None
+    language: Optional[str] = None  # detected from the code and error log when omitted
+
+class ProposedFix(BaseModel):
+    fixed_code: str
+    explanation: str
+    confidence_score: float
+    changes_summary: str
+
+class NodeUsage(BaseModel):
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    cost_usd: float
+
+class PolicyDecision(BaseModel):
+    action: str  # "skip", "cheap" or "full"
+    reason: str
+    confidence_score: float
+    changed_lines: int
+    compiles: Optional[bool]
 
 class DebugResponse(BaseModel):
     success: bool
     fixed_code: str
     explanation: str
     is_fixed: bool
+    status: str = ""
     iteration_count: int
     identified_issues: list
-    error_message: str = None
+    proposed_fixes: List[ProposedFix] = []
+    review_decisions: List[PolicyDecision] = []
+    llm_calls_saved: int = 0
+    model: str = ""
+    language: str = ""
+    token_usage: Dict[str, NodeUsage] = {}
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    error_message: Optional[str] = None
 
-@app.post("/debug", response_model=DebugResponse)
-async def debug_code(request: DebugRequest):
-    """Debug code using multi-agent workflow"""
+RESPONSE_FIELDS = set(DebugResponse.model_fields)
+
+def parse_fields(fields: Optional[str]) -> Optional[set]:
+    """Parse the comma separated `fields` projection into a set of field names"""
+    if not fields:
+        return None
+    
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - RESPONSE_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown response fields: {', '.join(sorted(unknown))}"
+        )
+    # Always tell the client whether the request worked
+    return selected | {"success"}
+
+def build_response(result: dict, model: str) -> DebugResponse:
+    """Map the final workflow state onto the API response"""
+    total = total_usage(result)
+    # An unapproved best fix is returned when the run stopped early
+    final_result = result.get("final_result") or result.get("best_fix")
+    error_analysis = result.get("error_analysis")
+    
+    identified_issues = []
+    if error_analysis:
+        identified_issues.append(
+            f"{error_analysis.error_type} at {error_analysis.error_location}: {error_analysis.root_cause}"
+        )
+    
+    return DebugResponse(
+        success=True,
+        fixed_code=final_result.fixed_code if final_result else result.get("current_code", ""),
+        explanation=final_result.explanation if final_result else (result.get("review_feedback") or ""),
+        is_fixed=result.get("status") == DebugStatus.COMPLETED,
+        status=result["status"].value if result.get("status") else "",
+        iteration_count=result.get("iteration_count", 0),
+        identified_issues=identified_issues,
+        proposed_fixes=[
+            ProposedFix(
+                fixed_code=fix.fixed_code,
+                explanation=fix.explanation,
+                confidence_score=fix.confidence_score,
+                changes_summary=fix.changes_summary
+            )
+            for fix in result.get("proposed_fixes", [])
+        ],
+        review_decisions=[
+            PolicyDecision(
+                action=decision.action,
+                reason=decision.reason,
+                confidence_score=decision.confidence_score,
+                changed_lines=decision.changed_lines,
+                compiles=decision.compiles
+            )
+            for decision in result.get("review_decisions", [])
+        ],
+        llm_calls_saved=result.get("llm_calls_saved", 0),
+        model=model,
+        language=result.get("language", ""),
+        token_usage={
+            node: NodeUsage(
+                calls=usage.calls,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cost_usd=usage.cost_usd
+            )
+            for node, usage in result.get("token_usage", {}).items()
+        },
+        total_tokens=total.total_tokens,
+        cost_usd=total.cost_usd
+    )
+
+def error_response(message: str) -> DebugResponse:
+    return DebugResponse(
+        success=False,
+        fixed_code="",
+        explanation="",
+        is_fixed=False,
+        iteration_count=0,
+        identified_issues=[],
+        error_message=message
+    )
+
+def check_rate_limit(request: DebugRequest):
+    if rate_limiter and not rate_limiter.allow(request.api_key):
+        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+
+def choose_model(request: DebugRequest) -> str:
+    """Apply the tenant's token budget: reject, or fall back to the cheap model"""
+    if TENANT_DAILY_TOKEN_BUDGET <= 0:
+        return DEFAULT_MODEL
+    
+    tokens, _ = tenant_usage.get(request.api_key)
+    if tokens < TENANT_DAILY_TOKEN_BUDGET:
+        return DEFAULT_MODEL
+    if TENANT_OVER_BUDGET == "downgrade":
+        return DOWNGRADE_MODEL
+    raise HTTPException(status_code=429, detail="Daily token budget exhausted")
+
+def run_debug(request: DebugRequest, cancel_event: threading.Event, model: str) -> DebugResponse:
+    """Run the debugging workflow for one request (blocking)"""
     try:
-        # Initialize workflow
-        workflow = DebugWorkflow(request.api_key)
+        # Initialize workflow with this tenant's key; concurrent runs must not share it
+        workflow = DebugWorkflow(model, fix_index=fix_index, api_key=request.api_key)
         
-        # Run debugging
+        # Run debugging within the time budget
+        timeout = min(request.timeout_seconds or DEBUG_TIMEOUT_SECONDS, DEBUG_TIMEOUT_SECONDS)
         result = workflow.debug_code(
             request.code,
             request.error_log,
-            request.max_iterations
+            request.max_iterations,
+            timeout=timeout,
+            cancel_event=cancel_event,
+            language=request.language
         )
         
-        return DebugResponse(
-            success=True,
-            fixed_code=result.current_code,
-            explanation=result.final_explanation,
-            is_fixed=result.is_fixed,
-            iteration_count=result.iteration_count,
-            identified_issues=result.identified_issues
-        )
+        response = build_response(result, model)
+        tenant_usage.add(request.api_key, total_usage(result))
+        return response
         
     except Exception as e:
-        return DebugResponse(
-            success=False,
-            fixed_code="",
-            explanation="",
-            is_fixed=False,
-            iteration_count=0,
-            identified_issues=[],
-            error_message=str(e)
-        )
+        return error_response(str(e))
+
+async def run_until_disconnect(http_request: Request, cancel_event: threading.Event, func, *args, **kwargs):
+    """Run a blocking workflow call in the threadpool, cancelling it if the client disconnects"""
+    task = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            cancel_event.set()
+            return await task
+
+@app.post("/debug", response_model=DebugResponse)
+async def debug_code(
+    request: DebugRequest,
+    http_request: Request,
+    fields: Optional[str] = Query(None, description="Comma separated response fields to return, e.g. fixed_code,is_fixed")
+):
+    """Debug code using multi-agent workflow"""
+    include = parse_fields(fields)
+    # The shared store may block on a write lock; keep it off the event loop
+    await run_in_threadpool(check_rate_limit, request)
+    model = await run_in_threadpool(choose_model, request)
+    
+    cancel_event = threading.Event()
+    response = await run_until_disconnect(http_request, cancel_event, run_debug, request, cancel_event, model)
+    
+    # Serialize once with orjson, skipping fields the client did not ask for
+    return ORJSONResponse(response.model_dump(include=include))
+
+async def run_job(job_id: str, request: DebugRequest, model: str):
+    await run_in_threadpool(job_store.start, job_id)
+    response = await run_in_threadpool(run_debug, request, threading.Event(), model)
+    await run_in_threadpool(job_store.update, job_id, status="done", result=response.model_dump())
+
+@app.post("/debug/jobs")
+async def submit_debug_job(request: DebugRequest):
+    """Start a debug run in the background and return its job id"""
+    # The shared store may block on a write lock; keep it off the event loop
+    await run_in_threadpool(check_rate_limit, request)
+    model = await run_in_threadpool(choose_model, request)
+    
+    job_id = await run_in_threadpool(job_store.create)
+    task = asyncio.create_task(run_job(job_id, request, model))
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_debug_job(
+    job_id: str,
+    fields: Optional[str] = Query(None, description="Comma separated result fields to return")
+):
+    """Poll a background job; any worker process can answer"""
+    include = parse_fields(fields)
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if include and job.get("result"):
+        job["result"] = {key: value for key, value in job["result"].items() if key in include}
+    return job
 
 @app.get("/")
 async def root():
@@ -75,4 +315,4 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
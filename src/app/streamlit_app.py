@@ -281,9 +281,16 @@ class StreamlitApp:
             help="Maximum number of fix attempts"
         )
         
-        return model, max_iterations
+        # Incremental re-debug
+        incremental = st.sidebar.checkbox(
+            "Reuse previous analysis",
+            value=True,
+            help="On resubmission, skip re-analysis when the error is unchanged and the affected lines were not edited"
+        )
+        
+        return model, max_iterations, incremental
     
-    def render_main_interface(self, model: str, max_iterations: int):
+    def render_main_interface(self, model: str, max_iterations: int, incremental: bool = True):
         """Render main debugging interface"""
         
         st.title("🐛 AI Code Debugger")
@@ -346,11 +353,15 @@ class StreamlitApp:
             # Run debugging workflow
             with st.spinner("🤖 AI agents are analyzing your code..."):
                 try:
+                    previous = st.session_state.get("last_result") if incremental else None
                     result = self.workflow.debug_code(
                         code_input, 
                         error_input, 
-                        max_iterations
+                        max_iterations,
+                        previous=previous
                     )
+                    # Remember this run for the next resubmission
+                    st.session_state["last_result"] = result
                     
                     self.display_results(result)
                     
@@ -377,7 +388,7 @@ class StreamlitApp:
             final_result = result.get("final_result")
             if final_result:
                 st.subheader("Fixed Code")
-                st.code(final_result.fixed_code, language="python")
+                st.code(final_result.fixed_code, language=result.get("language", "python"))
                 
                 st.subheader("Explanation")
                 st.write(final_result.explanation)
@@ -446,10 +457,10 @@ class StreamlitApp:
         """Run the Streamlit app"""
         
         # Render sidebar
-        model, max_iterations = self.render_sidebar()
+        model, max_iterations, incremental = self.render_sidebar()
         
         # Render main interface
-        self.render_main_interface(model, max_iterations)
+        self.render_main_interface(model, max_iterations, incremental)
         
         # Footer
         st.divider()
@@ -0,0 +1,305 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+from src.models.schemas import CodeFix, ErrorAnalysis, IndexEntry, IndexMatch
+
+FRAME_RE = re.compile(r'^\s*File "(?P<file>[^"]+)", line (?P<line>\d+)(?:, in (?P<func>\S+))?', re.MULTILINE)
+EXCEPTION_RE = re.compile(r"^(?P<type>[A-Za-z_][\w.]*(?:Error|Exception|Warning|Interrupt|Exit))(?::\s*(?P<message>.*))?$", re.MULTILINE)
+
+# Message normalization: quoted values, addresses and numbers vary between users
+QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+HEX_RE = re.compile(r"0x[0-9a-fA-F]+")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+# Fingerprints are Python ASTs; other languages would all look alike
+INDEXED_LANGUAGES = ("python",)
+
+@dataclass(frozen=True)
+class ErrorSignature:
+    exception_type: str
+    message: str
+    frame_shape: Tuple[str, ...]
+    line_number: Optional[int]
+
+    @property
+    def key(self) -> str:
+        return f"{self.exception_type}:{self.message}"
+
+def normalize_message(message: str) -> str:
+    message = QUOTED_RE.sub("<str>", message)
+    message = HEX_RE.sub("<addr>", message)
+    return NUMBER_RE.sub("<num>", message).strip()
+
+def error_signature(error_log: str) -> Optional[ErrorSignature]:
+    """Extract the normalized signature of the final exception in a log"""
+    exceptions = list(EXCEPTION_RE.finditer(error_log))
+    if not exceptions:
+        return None
+    
+    last = exceptions[-1]
+    frames = [frame for frame in FRAME_RE.finditer(error_log) if frame.start() < last.start()]
+    # Depth and innermost function names; paths and line numbers differ between users
+    frame_shape = tuple(frame.group("func") or "?" for frame in frames[-3:])
+    line_number = int(frames[-1].group("line")) if frames else None
+    
+    return ErrorSignature(
+        exception_type=last.group("type").rsplit(".", 1)[-1],
+        message=normalize_message(last.group("message") or ""),
+        frame_shape=(str(len(frames)),) + frame_shape,
+        line_number=line_number
+    )
+
+def _failing_node(tree: ast.AST, line_number: Optional[int]) -> ast.AST:
+    """Return the innermost function containing the line, or the whole module"""
+    if line_number is None:
+        return tree
+    
+    best = tree
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            end = getattr(node, "end_lineno", node.lineno)
+            if node.lineno <= line_number <= end and node.lineno >= getattr(best, "lineno", 0):
+                best = node
+    return best
+
+def ast_fingerprint(code: str, line_number: Optional[int] = None, ngram: int = 3) -> List[int]:
+    """Shingle the node-type sequence of the failing function.
+
+    Identifiers and literals are ignored so renamed variables still match.
+    Returns an empty list when the code is not valid Python.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return []
+    
+    node_types = [type(node).__name__ for node in ast.walk(_failing_node(tree, line_number))]
+    grams = {
+        "/".join(node_types[i:i + ngram])
+        for i in range(max(1, len(node_types) - ngram + 1))
+    }
+    return sorted(
+        int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "big")
+        for gram in grams
+    )
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+def jaccard(left: frozenset, right: frozenset) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+class FixIndex:
+    """In-process similarity index of approved fixes, keyed by error signature.
+
+    Entries are bucketed by exception type and normalized message, so a lookup
+    only compares AST fingerprints within one small bucket. The index keeps at
+    most `max_entries` (least recently used are evicted) and appends new entries
+    to a JSONL file so it survives restarts.
+
+    Several worker processes can share one file: appends are serialized with a
+    file lock and each process picks up the others' entries every
+    `refresh_interval` seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000, max_bucket_size: int = 32,
+                 refresh_interval: float = 2.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bucket_size = max_bucket_size
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._reset()
+        # Position in the JSONL file up to which entries are loaded
+        self._inode = None
+        self._offset = 0
+        self._last_refresh = 0.0
+        
+        if path:
+            with self._lock:
+                self._refresh(compact=True)
+    
+    def _reset(self):
+        self._entries: "OrderedDict[int, IndexEntry]" = OrderedDict()
+        self._shingles: Dict[int, frozenset] = {}
+        self._buckets: Dict[str, List[int]] = {}
+        self._next_id = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def lookup(self, code: str, error_log: str, min_similarity: float = 0.6) -> Optional[IndexMatch]:
+        """Find the most similar approved fix for this code and error"""
+        signature = error_signature(error_log)
+        if signature is None:
+            return None
+        
+        with self._lock:
+            if self.path and time.monotonic() - self._last_refresh >= self.refresh_interval:
+                self._refresh()
+            
+            bucket = self._buckets.get(signature.key)
+            if not bucket:
+                return None
+            
+            shingles = frozenset(ast_fingerprint(code, signature.line_number))
+            digest = code_hash(code)
+            best: Optional[IndexMatch] = None
+            best_id = None
+            for entry_id in bucket:
+                entry = self._entries[entry_id]
+                exact_code = entry.code_hash == digest
+                if not exact_code and not (shingles and self._shingles[entry_id]):
+                    # Code that does not parse has no fingerprint to compare
+                    continue
+                similarity = 1.0 if exact_code else (
+                    0.8 * jaccard(shingles, self._shingles[entry_id])
+                    + 0.2 * (tuple(entry.frame_shape) == signature.frame_shape)
+                )
+                if similarity >= min_similarity and (best is None or similarity > best.similarity):
+                    best = IndexMatch(entry=entry, similarity=similarity, exact_code=exact_code)
+                    best_id = entry_id
+            
+            if best_id is not None:
+                self._entries.move_to_end(best_id)
+            return best
+    
+    def add(self, code: str, error_log: str, error_analysis: ErrorAnalysis, code_fix: CodeFix) -> bool:
+        """Record an approved fix. Returns False when the log has no recognizable exception"""
+        signature = error_signature(error_log)
+        if signature is None:
+            return False
+        
+        entry = IndexEntry(
+            key=signature.key,
+            frame_shape=list(signature.frame_shape),
+            shingles=ast_fingerprint(code, signature.line_number),
+            code_hash=code_hash(code),
+            error_analysis=error_analysis,
+            code_fix=code_fix
+        )
+        with self._lock:
+            self._insert(entry)
+            if self.path:
+                self._append(entry)
+        return True
+    
+    def _insert(self, entry: IndexEntry):
+        bucket = self._buckets.setdefault(entry.key, [])
+        # A newer fix for the same code and error replaces the older one
+        for entry_id in bucket:
+            if self._entries[entry_id].code_hash == entry.code_hash:
+                self._evict(entry_id)
+                bucket = self._buckets.setdefault(entry.key, [])
+                break
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._shingles[entry_id] = frozenset(entry.shingles)
+        bucket.append(entry_id)
+        
+        if len(bucket) > self.max_bucket_size:
+            self._evict(bucket[0])
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+    
+    def _evict(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        del self._shingles[entry_id]
+        bucket = self._buckets[entry.key]
+        bucket.remove(entry_id)
+        if not bucket:
+            del self._buckets[entry.key]
+    
+    def _append(self, entry: IndexEntry):
+        data = (json.dumps(asdict(entry)) + "\n").encode()
+        while True:
+            with open(self.path, "ab") as f:
+                _lock_file(f)
+                inode = os.fstat(f.fileno()).st_ino
+                if inode != os.stat(self.path).st_ino:
+                    # Another worker compacted the file after we opened it
+                    continue
+                start = f.seek(0, os.SEEK_END)
+                f.write(data)
+                # Skip our own line on the next refresh if nothing was missed
+                if inode == self._inode and start == self._offset:
+                    self._offset = start + len(data)
+                return
+    
+    def _refresh(self, compact: bool = False):
+        """Load entries appended to the JSONL file since the last refresh"""
+        self._last_refresh = time.monotonic()
+        self._lines_read = 0
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        
+        if stat.st_ino != self._inode:
+            # New or compacted file: reload from the start
+            self._reset()
+            self._inode = stat.st_ino
+            self._offset = 0
+        if stat.st_size > self._offset:
+            with open(self.path, "rb") as f:
+                self._read_from(f)
+        
+        if compact and self._lines_read > 2 * len(self._entries):
+            self._compact()
+    
+    def _read_from(self, f):
+        self._lines_read = 0
+        f.seek(self._offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Another worker is still writing this line
+                break
+            self._offset += len(line)
+            self._lines_read += 1
+            try:
+                data = json.loads(line)
+                data["error_analysis"] = ErrorAnalysis(**data["error_analysis"])
+                data["code_fix"] = CodeFix(**data["code_fix"])
+                self._insert(IndexEntry(**data))
+            except (ValueError, TypeError, KeyError):
+                # Skip a torn or outdated line instead of losing the whole index
+                continue
+    
+    def _compact(self):
+        """Rewrite the file with only the live entries"""
+        with open(self.path, "ab") as lock:
+            _lock_file(lock)
+            # Pick up anything appended before we got the lock
+            with open(self.path, "rb") as f:
+                self._read_from(f)
+            
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                for entry in self._entries.values():
+                    f.write((json.dumps(asdict(entry)) + "\n").encode())
+            os.replace(tmp_path, self.path)
+            
+            stat = os.stat(self.path)
+            self._inode = stat.st_ino
+            self._offset = stat.st_size
+
+def _lock_file(f):
+    """Hold an exclusive lock on the file until it is closed"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
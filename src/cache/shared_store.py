@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Union
+
+# Delete expired rows after this many writes on a connection
+PURGE_EVERY_WRITES = 1000
+
+class SQLiteStore:
+    """Key-value store shared by all worker processes on one host.
+
+    Implements the subset of the redis-py client used by the app (`get`, `set`,
+    `incrby`, `expire`, `delete`), so a Redis client can be dropped in for
+    multi-host deployments. Uses SQLite in WAL mode so readers never block the
+    writer, with one connection per thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.writes = 0
+        return conn
+    
+    def _after_write(self, conn: sqlite3.Connection):
+        self._local.writes += 1
+        if self._local.writes % PURGE_EVERY_WRITES == 0:
+            conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+    
+    def get(self, name: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (name, time.time())
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+    
+    def set(self, name: str, value: Union[str, bytes], ex: Optional[float] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (name, value, time.time() + ex if ex else None)
+        )
+        self._after_write(conn)
+        return True
+    
+    def incrby(self, name: str, amount: int = 1) -> int:
+        """Atomically add to an integer value, treating missing or expired keys as 0"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM kv WHERE key = ?", (name,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                value, expires_at = amount, None
+            else:
+                value, expires_at = int(row[0]) + amount, row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (name, str(value).encode(), expires_at)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._after_write(conn)
+        return value
+    
+    def expire(self, name: str, time_seconds: float) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE kv SET expires_at = ? WHERE key = ?", (time.time() + time_seconds, name)
+        )
+        return cursor.rowcount > 0
+    
+    def delete(self, *names: str) -> int:
+        cursor = self._connect().execute(
+            f"DELETE FROM kv WHERE key IN ({', '.join('?' for _ in names)})", names
+        )
+        return cursor.rowcount
+
+def client_id(api_key: str) -> str:
+    """Stable tenant id for an API key; raw keys are never stored"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+def open_store(url: str):
+    """Open a shared store from a URL: `redis://...` or a SQLite file path"""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        return redis.Redis.from_url(url)
+    return SQLiteStore(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url)
+
+class RateLimiter:
+    """Fixed-window request limit per client, counted in the shared store"""
+
+    def __init__(self, store, limit: int, window_seconds: int = 60):
+        self.store = store
+        self.limit = limit
+        self.window_seconds = window_seconds
+    
+    def allow(self, api_key: str) -> bool:
+        client = client_id(api_key)
+        window = int(time.time() // self.window_seconds)
+        key = f"ratelimit:{client}:{window}"
+        count = self.store.incrby(key, 1)
+        if count == 1:
+            self.store.expire(key, self.window_seconds * 2)
+        return count <= self.limit
+
+class JobStore:
+    """Status and results of background debug jobs, visible to every worker.
+
+    A job runs in the worker that accepted it. If that worker dies the job
+    would stay queued or running forever, so a job that has not been updated
+    for `stale_after` seconds is reported as failed.
+    """
+
+    def __init__(self, store, ttl_seconds: int = 3600, stale_after: Optional[float] = None):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.stale_after = stale_after
+    
+    def create(self) -> str:
+        job_id = uuid.uuid4().hex
+        self.update(job_id, status="queued")
+        return job_id
+    
+    def start(self, job_id: str):
+        """Mark a job running in this worker process"""
+        self.update(job_id, status="running", worker=f"{socket.gethostname()}:{os.getpid()}")
+    
+    def update(self, job_id: str, **fields: Any):
+        job = self._read(job_id) or {"job_id": job_id}
+        job.update(fields, updated_at=time.time())
+        self.store.set(f"job:{job_id}", json.dumps(job), ex=self.ttl_seconds)
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._read(job_id)
+        if (job and self.stale_after and job["status"] in ("queued", "running")
+                and time.time() - job.get("updated_at", 0) > self.stale_after):
+            job["status"] = "failed"
+            job["error_message"] = f"Job abandoned: no progress for {self.stale_after:.0f}s (worker {job.get('worker', 'unknown')} likely exited)"
+        return job
+    
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        value = self.store.get(f"job:{job_id}")
+        return None if value is None else json.loads(value)
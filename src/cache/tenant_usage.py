@@ -0,0 +1,126 @@
+import atexit
+import threading
+import time
+from typing import Dict, List, Tuple
+from src.models.schemas import TokenUsage
+from src.cache.shared_store import client_id
+
+class TenantUsage:
+    """Daily token and cost totals per tenant, shared by all workers.
+
+    Requests add to an in-process shard chosen by tenant, so requests for
+    different tenants rarely wait on the same lock and none wait on the shared
+    store. Shards are flushed to the store with one `incrby` per tenant and
+    counter every `flush_interval` seconds; reads combine both. `start()` runs
+    that flush on a timer so totals of an idle worker still reach the store,
+    and `close()` pushes whatever is left when the worker shuts down. Without
+    `start()` (scripts, tests) `add()` flushes when the interval has passed.
+    """
+
+    def __init__(self, store, shards: int = 16, flush_interval: float = 5.0, period_seconds: int = 86400):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.period_seconds = period_seconds
+        self._shards: List[Dict[str, List[int]]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._flusher = None
+    
+    def start(self):
+        """Flush every `flush_interval` seconds in a daemon thread and once more at exit"""
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="tenant-usage-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+    
+    def close(self):
+        """Stop the flush thread and push the remaining totals"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+            atexit.unregister(self.close)
+        self.flush(wait=True)
+    
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # A store outage must not end the loop; unwritten totals were put back for the next tick
+                pass
+    
+    def _shard(self, tenant: str) -> int:
+        return hash(tenant) % len(self._shards)
+    
+    def _keys(self, tenant: str) -> Tuple[str, str]:
+        period = int(time.time() // self.period_seconds)
+        return f"usage:tokens:{tenant}:{period}", f"usage:microusd:{tenant}:{period}"
+    
+    def add(self, api_key: str, usage: TokenUsage):
+        tenant = client_id(api_key)
+        index = self._shard(tenant)
+        with self._locks[index]:
+            totals = self._shards[index].setdefault(tenant, [0, 0])
+            totals[0] += usage.total_tokens
+            totals[1] += round(usage.cost_usd * 1_000_000)
+        
+        # Once start() has run the timer flushes; requests never wait on the store
+        if self._flusher is None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+    
+    def get(self, api_key: str) -> Tuple[int, float]:
+        """Tokens and USD used by the tenant in the current period"""
+        tenant = client_id(api_key)
+        tokens_key, cost_key = self._keys(tenant)
+        tokens = int(self.store.get(tokens_key) or 0)
+        micro_usd = int(self.store.get(cost_key) or 0)
+        
+        index = self._shard(tenant)
+        with self._locks[index]:
+            pending = self._shards[index].get(tenant, [0, 0])
+            tokens += pending[0]
+            micro_usd += pending[1]
+        return tokens, micro_usd / 1_000_000
+    
+    def flush(self, wait: bool = False):
+        """Move local totals to the shared store; concurrent callers skip unless `wait`
+
+        Totals that could not be written are put back, so the next flush retries them.
+        """
+        if not self._flush_lock.acquire(blocking=wait):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            for index, lock in enumerate(self._locks):
+                with lock:
+                    pending, self._shards[index] = self._shards[index], {}
+                try:
+                    self._write(pending)
+                except Exception:
+                    self._restore(index, pending)
+                    raise
+        finally:
+            self._flush_lock.release()
+    
+    def _write(self, pending: Dict[str, List[int]]):
+        """Add the totals to the store, removing each counter from `pending` once written"""
+        for tenant, totals in list(pending.items()):
+            tokens_key, cost_key = self._keys(tenant)
+            for position, key in ((0, tokens_key), (1, cost_key)):
+                if totals[position]:
+                    self.store.incrby(key, totals[position])
+                    totals[position] = 0
+                    self.store.expire(key, self.period_seconds * 2)
+            del pending[tenant]
+    
+    def _restore(self, index: int, pending: Dict[str, List[int]]):
+        with self._locks[index]:
+            for tenant, (tokens, micro_usd) in pending.items():
+                totals = self._shards[index].setdefault(tenant, [0, 0])
+                totals[0] += tokens
+                totals[1] += micro_usd
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from src.agents.log_condenser import CondensedLog, LogCondenser
+
+@dataclass
+class TracebackInfo:
+    error_type: str
+    message: str
+    line_number: Optional[int]
+    file: Optional[str] = None
+    function: Optional[str] = None
+
+class LanguagePlugin:
+    """Local, LLM-free helpers for one language.
+
+    Subclasses override what they can do better than the generic fallbacks.
+    """
+
+    name = "text"
+    # Tag used for markdown code fences in prompts
+    fence = ""
+    # Lines of context kept on each side of the failing line
+    context_radius = 20
+
+    def parse_traceback(self, error_log: str) -> Optional[TracebackInfo]:
+        """Final error and innermost frame of the log, or None if not recognized"""
+        return None
+    
+    def check_syntax(self, code: str) -> Optional[bool]:
+        """True if the code parses, False if it does not, None if unknown"""
+        return None
+    
+    def extract_context(self, code: str, line_number: Optional[int]) -> str:
+        """The part of the code around the failing line, with line numbers"""
+        lines = code.splitlines()
+        if line_number is None or not 1 <= line_number <= len(lines):
+            return number_lines(lines, 1)
+        start = max(1, line_number - self.context_radius)
+        end = min(len(lines), line_number + self.context_radius)
+        return number_lines(lines[start - 1:end], start)
+
+    def condense_log(self, error_log: str, condenser: LogCondenser) -> CondensedLog:
+        """Shrink an oversized log to the condenser's budget.
+
+        Generic fallback: keep the end of the log, where the final error usually is.
+        """
+        return CondensedLog(
+            text=error_log[-condenser.char_budget:],
+            original_chars=len(error_log),
+            traceback_count=0,
+            unique_tracebacks=0
+        )
+    
+    def split_points(self, code: str) -> List[int]:
+        """Lines where the code can be cut into independent chunks.
+
+        Generic fallback: unindented lines that follow a blank line.
+        """
+        lines = code.splitlines()
+        return [number for number, (previous, line) in enumerate(zip(lines, lines[1:]), 2)
+                if not previous.strip() and line.strip() and not line[0].isspace()]
+
+def number_lines(lines, first: int) -> str:
+    width = len(str(first + len(lines)))
+    return "\n".join(f"{number:>{width}} | {line}" for number, line in enumerate(lines, first))
@@ -0,0 +1,186 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+from src.agents.log_condenser import TIMESTAMP_RE, CondensedLog, LogCondenser
+from src.languages.base import LanguagePlugin, TracebackInfo
+
+try:
+    import esprima
+except ImportError:
+    esprima = None
+
+# "TypeError: Cannot read properties of undefined (reading 'x')"
+ERROR_RE = re.compile(r"^(?:Uncaught )?(?P<type>(?:[A-Z]\w*)?(?:Error|Exception))(?::\s*(?P<message>.*))?$", re.MULTILINE)
+# "    at render (/app/src/view.js:10:15)", "    at async load (...)" or "    at /app/src/view.js:10:15"
+FRAME_RE = re.compile(r"^\s*at (?:(?:async |new )?(?P<func>[^\s(]+) \()?(?P<file>[^()\s]+?):(?P<line>\d+):\d+\)?\s*$", re.MULTILINE)
+# "src/view.ts(10,15): error TS2339: Property 'x' does not exist"
+TSC_RE = re.compile(r"^(?P<file>[^\s(]+)\((?P<line>\d+),\d+\): error (?P<type>TS\d+): (?P<message>.*)$", re.MULTILINE)
+# Keep node's syntax check from holding up a request
+NODE_CHECK_TIMEOUT = 5
+
+def _is_library(path: str) -> bool:
+    return path.startswith("node:") or "node_modules" in path
+
+class JavaScriptPlugin(LanguagePlugin):
+    name = "javascript"
+    fence = "javascript"
+
+    def parse_traceback(self, error_log: str) -> Optional[TracebackInfo]:
+        compiler_error = TSC_RE.search(error_log)
+        if compiler_error:
+            return TracebackInfo(
+                error_type=compiler_error.group("type"),
+                message=compiler_error.group("message"),
+                line_number=int(compiler_error.group("line")),
+                file=compiler_error.group("file")
+            )
+        
+        errors = list(ERROR_RE.finditer(error_log))
+        if not errors:
+            return None
+        
+        error = errors[-1]
+        # Node prints the innermost frame first, right after the error line
+        frames = list(FRAME_RE.finditer(error_log, error.end()))
+        # Prefer the first frame in user code over node internals and dependencies
+        user_frames = [f for f in frames if not _is_library(f.group("file"))]
+        frame = (user_frames or frames or [None])[0]
+        
+        return TracebackInfo(
+            error_type=error.group("type"),
+            message=(error.group("message") or "").strip(),
+            line_number=int(frame.group("line")) if frame else None,
+            file=frame.group("file") if frame else None,
+            function=frame.group("func") if frame else None
+        )
+    
+    def condense_log(self, error_log: str, condenser: LogCondenser) -> CondensedLog:
+        """Keep Node errors with their stack frames (deduplicated) and tsc errors"""
+        # Error block text -> occurrences, in last-seen order
+        blocks: Dict[str, int] = {}
+        compiler_errors: Dict[str, None] = {}
+        current: Optional[List[str]] = None
+        error_count = 0
+        
+        def close_block():
+            nonlocal current
+            if current:
+                key = "\n".join(current)
+                blocks[key] = blocks.pop(key, 0) + 1
+            current = None
+        
+        for raw_line in error_log.splitlines():
+            line = TIMESTAMP_RE.sub("", raw_line).rstrip()
+            if ERROR_RE.match(line.strip()):
+                close_block()
+                current = [line.strip()]
+                error_count += 1
+            elif current is not None and FRAME_RE.match(line):
+                current.append("    " + line.strip())
+            else:
+                close_block()
+                if TSC_RE.match(line.strip()):
+                    compiler_errors[line.strip()] = None
+        close_block()
+        
+        if not blocks and not compiler_errors:
+            return super().condense_log(error_log, condenser)
+        
+        text = self._render_condensed(list(blocks.items()), list(compiler_errors), condenser)
+        return CondensedLog(
+            text=text,
+            original_chars=len(error_log),
+            traceback_count=error_count,
+            unique_tracebacks=len(blocks)
+        )
+    
+    def _render_condensed(self, blocks, compiler_errors: List[str], condenser: LogCondenser) -> str:
+        budget = condenser.char_budget
+        
+        def render_block(key: str, count: int, max_frames: Optional[int] = None) -> str:
+            error, *frames = key.split("\n")
+            if max_frames is not None and len(frames) > max_frames:
+                # Node lists the innermost frame first
+                frames = frames[:max_frames] + [f"    ... {len(frames) - max_frames} more frames"]
+            lines = [error] + frames
+            if count > 1:
+                lines.append(f"[This error occurred {count} times in the log]")
+            return "\n".join(lines)
+        
+        # The final error always survives, then compiler errors, then earlier errors newest first
+        final = ""
+        if blocks:
+            for max_frames in (None, 40, 20, 10, 5):
+                final = render_block(*blocks[-1], max_frames)
+                if len(final) <= budget:
+                    break
+        used = len(final)
+        
+        kept_compiler_errors = []
+        for line in reversed(compiler_errors[-condenser.max_error_lines:]):
+            if used + len(line) + 1 > budget:
+                break
+            kept_compiler_errors.append(line)
+            used += len(line) + 1
+        
+        earlier = []
+        for key, count in reversed(blocks[:-1]):
+            text = render_block(key, count, max_frames=10)
+            if used + len(text) + 2 > budget:
+                continue
+            earlier.append(text)
+            used += len(text) + 2
+        
+        sections = list(reversed(earlier))
+        if kept_compiler_errors:
+            sections.append("\n".join(reversed(kept_compiler_errors)))
+        if final:
+            sections.append(final)
+        return "\n\n".join(sections)[-budget:]
+    
+    def check_syntax(self, code: str) -> Optional[bool]:
+        if esprima is not None:
+            try:
+                esprima.parseModule(code, {"jsx": True})
+                return True
+            except esprima.Error:
+                try:
+                    esprima.parseScript(code, {"jsx": True})
+                    return True
+                except esprima.Error:
+                    return False
+        return self._node_check(code, ".mjs" if re.search(r"^\s*(import|export)\b", code, re.MULTILINE) else ".js")
+    
+    def _node_check(self, code: str, suffix: str) -> Optional[bool]:
+        node = shutil.which("node")
+        if node is None:
+            return None
+        
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8") as f:
+            f.write(code)
+        try:
+            completed = subprocess.run(
+                [node, "--check", f.name], capture_output=True, timeout=NODE_CHECK_TIMEOUT
+            )
+            return completed.returncode == 0
+        except subprocess.TimeoutExpired:
+            return None
+        finally:
+            os.unlink(f.name)
+
+class TypeScriptPlugin(JavaScriptPlugin):
+    name = "typescript"
+    fence = "typescript"
+
+    def check_syntax(self, code: str) -> Optional[bool]:
+        # Type annotations are not valid JavaScript; without a TypeScript
+        # parser installed the result is unknown rather than a false failure
+        try:
+            from tree_sitter_language_pack import get_parser
+        except ImportError:
+            return None
+        tree = get_parser("typescript").parse(code.encode())
+        return not tree.root_node.has_error
@@ -0,0 +1,81 @@
+import ast
+import re
+from typing import List, Optional
+from src.agents.log_condenser import CondensedLog, LogCondenser
+from src.cache.fix_index import EXCEPTION_RE, FRAME_RE
+from src.languages.base import LanguagePlugin, TracebackInfo, number_lines
+
+# Installed packages, the standard library (".../lib/python3.11/", "C:\\Python311\\Lib\\") and frozen modules
+LIBRARY_PATH_RE = re.compile(r"[/\\](?:site|dist)-packages[/\\]|[/\\]lib[/\\]python\d[\d.]*[/\\]|[/\\]Lib[/\\]|^<frozen ")
+
+def _is_library(path: str) -> bool:
+    return bool(LIBRARY_PATH_RE.search(path))
+
+class PythonPlugin(LanguagePlugin):
+    name = "python"
+    fence = "python"
+
+    def parse_traceback(self, error_log: str) -> Optional[TracebackInfo]:
+        exceptions = list(EXCEPTION_RE.finditer(error_log))
+        if not exceptions:
+            return None
+        
+        last = exceptions[-1]
+        frames = [frame for frame in FRAME_RE.finditer(error_log) if frame.start() < last.start()]
+        # The innermost frame in the user's own code, not in a library it called
+        user_frames = [f for f in frames if not _is_library(f.group("file"))]
+        frame = (user_frames or frames or [None])[-1]
+        return TracebackInfo(
+            error_type=last.group("type").rsplit(".", 1)[-1],
+            message=(last.group("message") or "").strip(),
+            line_number=int(frame.group("line")) if frame else None,
+            file=frame.group("file") if frame else None,
+            function=frame.group("func") if frame else None
+        )
+    
+    def condense_log(self, error_log: str, condenser: LogCondenser) -> CondensedLog:
+        return condenser.condense(error_log)
+    
+    def check_syntax(self, code: str) -> Optional[bool]:
+        try:
+            compile(code, "<fix>", "exec")
+            return True
+        except (SyntaxError, ValueError):
+            return False
+    
+    def extract_context(self, code: str, line_number: Optional[int]) -> str:
+        """The enclosing function (or class) when it is small enough, else a window"""
+        if line_number is None:
+            return super().extract_context(code, line_number)
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return super().extract_context(code, line_number)
+        
+        best = None
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = _first_line(node)
+                if start <= line_number <= node.end_lineno and (best is None or start >= best[0]):
+                    best = (start, node.end_lineno)
+        
+        if best is None or best[1] - best[0] > 4 * self.context_radius:
+            return super().extract_context(code, line_number)
+        lines = code.splitlines()
+        return number_lines(lines[best[0] - 1:best[1]], best[0])
+    
+    def split_points(self, code: str) -> List[int]:
+        """Starts of top-level statements and of the members of top-level classes"""
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return super().split_points(code)
+        
+        nodes = list(tree.body)
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                nodes.extend(node.body[1:])
+        return [_first_line(node) for node in nodes]
+
+def _first_line(node: ast.AST) -> int:
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
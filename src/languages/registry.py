@@ -0,0 +1,54 @@
+import importlib
+import re
+from typing import Dict, Optional
+from src.languages.base import LanguagePlugin
+
+# Plugins are imported on first use so unused languages cost nothing at startup
+PLUGINS: Dict[str, str] = {
+    "python": "src.languages.python_plugin:PythonPlugin",
+    "javascript": "src.languages.javascript_plugin:JavaScriptPlugin",
+    "typescript": "src.languages.javascript_plugin:TypeScriptPlugin",
+}
+
+DEFAULT_LANGUAGE = "python"
+
+# Strong signals in the error log
+LOG_SIGNALS = [
+    (re.compile(r"Traceback \(most recent call last\)|^\s*File \"[^\"]+\", line \d+", re.MULTILINE), "python"),
+    (re.compile(r"\.tsx?[:(]\d+|error TS\d+:"), "typescript"),
+    (re.compile(r"^\s*at .*\.(?:m|c)?jsx?:\d+:\d+\)?$|node:internal", re.MULTILINE), "javascript"),
+]
+
+# Weaker signals in the code itself, scored per language
+CODE_SIGNALS = {
+    "python": re.compile(r"^\s*(?:def |class \w+.*:$|import \w+$|from \w[\w.]* import |elif |if __name__)", re.MULTILINE),
+    "typescript": re.compile(r"^\s*(?:interface |type \w+ =|enum |import type )|\w+\??: (?:string|number|boolean|any)\b", re.MULTILINE),
+    "javascript": re.compile(r"^\s*(?:const |let |var |function\b|export |import .* from ['\"])|=> ?\{|;\s*$|require\(", re.MULTILINE),
+}
+
+_loaded: Dict[str, LanguagePlugin] = {}
+
+def detect_language(code: str, error_log: str = "") -> str:
+    """Guess the language of a submission from the error log, then the code"""
+    for pattern, language in LOG_SIGNALS:
+        if pattern.search(error_log):
+            return language
+    
+    scores = {language: len(pattern.findall(code)) for language, pattern in CODE_SIGNALS.items()}
+    # TypeScript is a superset of JavaScript: its own markers decide
+    if scores["typescript"]:
+        return "typescript"
+    best = max(scores, key=scores.get)
+    return best if scores[best] else DEFAULT_LANGUAGE
+
+def get_plugin(language: Optional[str]) -> LanguagePlugin:
+    """Load (once) and return the plugin for a language, or the generic fallback"""
+    language = language or DEFAULT_LANGUAGE
+    if language not in _loaded:
+        target = PLUGINS.get(language)
+        if target is None:
+            _loaded[language] = LanguagePlugin()
+        else:
+            module_name, class_name = target.split(":")
+            _loaded[language] = getattr(importlib.import_module(module_name), class_name)()
+    return _loaded[language]
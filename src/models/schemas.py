@@ -1,3 +1,4 @@
+import threading
 from typing import List, Dict, Optional, TypedDict
 from dataclasses import dataclass
 from enum import Enum
@@ -8,6 +9,8 @@ class DebugStatus(Enum):
     REVIEWING = "reviewing"
     COMPLETED = "completed"
     FAILED = "failed"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
 
 @dataclass
 class CodeFix:
@@ -25,6 +28,67 @@ class ErrorAnalysis:
     severity: str
     affected_lines: List[int]
 
+@dataclass
+class ReviewDecision:
+    action: str  # "skip", "cheap" or "full"
+    reason: str
+    confidence_score: float
+    changed_lines: int
+    compiles: Optional[bool]
+
+@dataclass
+class IndexEntry:
+    key: str
+    frame_shape: List[str]
+    shingles: List[int]
+    code_hash: str
+    error_analysis: ErrorAnalysis
+    code_fix: CodeFix
+
+@dataclass
+class IndexMatch:
+    entry: IndexEntry
+    similarity: float
+    exact_code: bool
+
+@dataclass
+class IterationRecord:
+    iteration: int
+    diff: str
+    objection: str
+    fix_hash: str
+    repeats: int = 0  # times the fixer proposed it again after the rejection
+
+@dataclass
+class SpeculationRecord:
+    used: bool
+    reason: str
+    parse_seconds: float
+    fix_seconds: Optional[float]
+    saved_seconds: float
+    # Usage of the speculative fixer, also in token_usage["fixer_speculative"]
+    llm_calls: int
+    input_tokens: int
+    output_tokens: int
+    wasted_tokens: int  # all of it when the fix was discarded
+
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+@dataclass
+class CodeChunk:
+    start_line: int  # 1-based, inclusive
+    end_line: int
+    code: str
+
 class DebugState(TypedDict):
     original_code: str
     error_log: str
@@ -38,6 +102,18 @@ class DebugState(TypedDict):
     max_iterations: int
     reasoning_steps: List[str]
     final_result: Optional[CodeFix]
+    review_decisions: List[ReviewDecision]
+    llm_calls_saved: int
+    similar_fix: Optional[IndexMatch]
+    iteration_history: List[IterationRecord]
+    deadline: Optional[float]  # time.monotonic() value
+    cancel_event: Optional[threading.Event]
+    best_fix: Optional[CodeFix]
+    speculation: Optional[SpeculationRecord]
+    token_usage: Dict[str, TokenUsage]  # keyed by node
+    language: str  # key into src.languages.registry.PLUGINS
+    raw_error_log: str  # as submitted, before condensing
+    focus: Optional[CodeChunk]  # region the fixer works on, when narrowed down
 
 
 
@@ -1,17 +1,37 @@
-from typing import Dict, Any
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from src.agents.parser_agent import ParserAgent
 from src.agents.fixer_agent import FixerAgent
 from src.agents.reviewer_agent import ReviewerAgent
+from src.agents.review_policy import ApprovalPolicy
+from src.cache.fix_index import INDEXED_LANGUAGES, FixIndex
+from src.agents.log_condenser import LogCondenser
+from src.workflow.incremental import focus_region, reusable_analysis
+from src.languages.registry import detect_language, get_plugin
+from src.workflow.speculation import SpeculativeParser
+from src.agents.llm_call import BudgetExhausted, Cancelled, check_budget
 # from src.models.state import DebugState, DebugStatus
 from src.models.schemas import DebugState, DebugStatus
 
 class DebugWorkflow:
-    def __init__(self, llm_model: str = "gpt-4"):
-        self.parser_agent = ParserAgent(llm_model)
-        self.fixer_agent = FixerAgent(llm_model)
-        self.reviewer_agent = ReviewerAgent(llm_model)
+    def __init__(self, llm_model: str = "gpt-4", reviewer_cheap_model: Optional[str] = "gpt-4o-mini",
+                 approval_policy: Optional[ApprovalPolicy] = ApprovalPolicy(),
+                 fix_index: Optional[FixIndex] = None,
+                 log_condenser: Optional[LogCondenser] = LogCondenser(),
+                 speculative: bool = False,
+                 api_key: Optional[str] = None):
+        self.fix_index = fix_index
+        self.log_condenser = log_condenser
+        # api_key defaults to OPENAI_API_KEY; servers pass each tenant's key explicitly
+        self.parser_agent = ParserAgent(llm_model, fix_index, api_key=api_key)
+        self.fixer_agent = FixerAgent(llm_model, api_key=api_key)
+        # Pass approval_policy=None to always run a full LLM review
+        self.reviewer_agent = ReviewerAgent(llm_model, reviewer_cheap_model, approval_policy, api_key=api_key)
+        # Overlap the first fixer call with the parser call
+        self.speculative_parser = SpeculativeParser(self.parser_agent, self.fixer_agent) if speculative else None
         
         # Build the workflow graph
         self.graph = self._build_graph()
@@ -22,13 +42,43 @@ class DebugWorkflow:
         workflow = StateGraph(DebugState)
         
         # Add nodes
-        workflow.add_node("parser", self.parser_agent.parse_error)
-        workflow.add_node("fixer", self.fixer_agent.generate_fix)
-        workflow.add_node("reviewer", self.reviewer_agent.review_fix)
+        workflow.add_node("condenser", self._with_budget(self._condense_log))
+        parse = self.speculative_parser.parse_error if self.speculative_parser else self.parser_agent.parse_error
+        workflow.add_node("parser", self._with_budget(parse))
+        workflow.add_node("fixer", self._with_budget(self.fixer_agent.generate_fix))
+        workflow.add_node("reviewer", self._with_budget(self.reviewer_agent.review_fix))
         
         # Add edges
-        workflow.add_edge("parser", "fixer")
-        workflow.add_edge("fixer", "reviewer")
+        # Skip the parser when a previous analysis was reused
+        workflow.add_conditional_edges(
+            "condenser",
+            self._after_condense,
+            {
+                "parser": "parser",
+                "fixer": "fixer"
+            }
+        )
+        # A speculative fix that was kept goes straight to review
+        workflow.add_conditional_edges(
+            "parser",
+            self._after_parse,
+            {
+                "fixer": "fixer",
+                "review": "reviewer",
+                "end": END
+            }
+        )
+        
+        # Repeated or failed fixes skip the reviewer
+        workflow.add_conditional_edges(
+            "fixer",
+            self._after_fix,
+            {
+                "review": "reviewer",
+                "retry": "fixer",
+                "end": END
+            }
+        )
         
         # Add conditional edges from reviewer
         workflow.add_conditional_edges(
@@ -41,10 +91,71 @@ class DebugWorkflow:
         )
         
         # Set entry point
-        workflow.set_entry_point("parser")
+        workflow.set_entry_point("condenser")
         
         return workflow.compile()
     
+    def _condense_log(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Shrink oversized error logs to the tracebacks that matter"""
+        error_log = state["error_log"]
+        if not self.log_condenser or len(error_log) <= self.log_condenser.char_budget:
+            return state
+        
+        # Each language knows which lines of its error output matter
+        condensed = get_plugin(state["language"]).condense_log(error_log, self.log_condenser)
+        state["error_log"] = condensed.text
+        state["reasoning_steps"].append(
+            f"Condenser: Reduced error log from {condensed.original_chars} to {len(condensed.text)} characters "
+            f"({condensed.traceback_count} tracebacks, {condensed.unique_tracebacks} distinct)"
+        )
+        return state
+    
+    def _with_budget(self, node: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """Check the deadline and cancellation before running a node"""
+        def run(state: Dict[str, Any]) -> Dict[str, Any]:
+            if state.get("status") in (DebugStatus.TIMED_OUT, DebugStatus.CANCELLED):
+                return state
+            try:
+                check_budget(state)
+                return node(state)
+            except BudgetExhausted as e:
+                return self._stop_early(state, e)
+        return run
+    
+    def _stop_early(self, state: Dict[str, Any], reason: BudgetExhausted) -> Dict[str, Any]:
+        """End the run and keep the best fix proposed so far"""
+        state["status"] = DebugStatus.CANCELLED if isinstance(reason, Cancelled) else DebugStatus.TIMED_OUT
+        if state["proposed_fixes"]:
+            state["best_fix"] = max(state["proposed_fixes"], key=lambda fix: fix.confidence_score)
+        state["reasoning_steps"].append(f"Workflow: Stopped early - {reason}")
+        return state
+    
+    def _after_condense(self, state: Dict[str, Any]) -> str:
+        """Go straight to the fixer when a previous analysis was reused"""
+        return "fixer" if state.get("error_analysis") else "parser"
+    
+    def _after_parse(self, state: Dict[str, Any]) -> str:
+        """Route the parser result to the fixer, or to review when a speculative fix was kept"""
+        status = state.get("status")
+        
+        if status == DebugStatus.REVIEWING:
+            return "review"
+        elif status == DebugStatus.FIXING:
+            return "fixer"
+        else:
+            return "end"
+    
+    def _after_fix(self, state: Dict[str, Any]) -> str:
+        """Route a fixer result to review, another fix attempt or the end"""
+        status = state.get("status")
+        
+        if status == DebugStatus.REVIEWING:
+            return "review"
+        elif status == DebugStatus.FIXING:
+            return "retry"
+        else:
+            return "end"
+    
     def _should_continue(self, state: Dict[str, Any]) -> str:
         """Determine if workflow should continue or end"""
         status = state.get("status")
@@ -56,26 +167,62 @@ class DebugWorkflow:
         else:
             return "end"
     
-    def debug_code(self, code: str, error_log: str, max_iterations: int = 3) -> Dict[str, Any]:
-        """Run the debugging workflow"""
+    def debug_code(self, code: str, error_log: str, max_iterations: int = 3,
+                   timeout: Optional[float] = None,
+                   cancel_event: Optional[threading.Event] = None,
+                   previous: Optional[Dict[str, Any]] = None,
+                   language: Optional[str] = None) -> Dict[str, Any]:
+        """Run the debugging workflow
+
+        `timeout` is a wall-clock budget in seconds for the whole run. Setting
+        `cancel_event` stops the run and abandons any in-flight LLM call.
+        Pass the result of the previous run on an edited resubmission as
+        `previous` to reuse its error analysis when it still applies; the
+        fixer then works on the definitions around the edited lines only.
+        `language` overrides detection from the code and error log.
+        """
+        
+        language = language or detect_language(code, error_log)
+        error_analysis = reusable_analysis(previous, code, error_log) if previous else None
+        focus = None
+        if error_analysis:
+            focus = focus_region(previous["original_code"], code, error_analysis.affected_lines,
+                                 get_plugin(language).split_points(code))
         
         # Initialize state
         initial_state = {
             "original_code": code,
             "error_log": error_log,
             "current_code": code,
-            "error_analysis": None,
+            "error_analysis": error_analysis,
             "proposed_fixes": [],
             "current_fix": None,
             "review_feedback": None,
-            "status": DebugStatus.PARSING,
+            "status": DebugStatus.FIXING if error_analysis else DebugStatus.PARSING,
             "iteration_count": 0,
             "max_iterations": max_iterations,
-            "reasoning_steps": [],
-            "final_result": None
+            "reasoning_steps": ["Workflow: Reused error analysis from the previous submission"] if error_analysis else [],
+            "final_result": None,
+            "review_decisions": [],
+            "llm_calls_saved": 0,
+            "similar_fix": None,
+            "iteration_history": [],
+            "deadline": time.monotonic() + timeout if timeout is not None else None,
+            "cancel_event": cancel_event,
+            "best_fix": None,
+            "speculation": None,
+            "token_usage": {},
+            "language": language,
+            "raw_error_log": error_log,
+            "focus": focus
         }
         
         # Run the workflow
         result = self.graph.invoke(initial_state)
         
+        # Remember approved fixes for near-duplicate errors
+        if (self.fix_index and language in INDEXED_LANGUAGES
+                and result.get("status") == DebugStatus.COMPLETED and result.get("final_result")):
+            self.fix_index.add(code, error_log, result["error_analysis"], result["final_result"])
+        
         return result
\ No newline at end of file
@@ -0,0 +1,96 @@
+import difflib
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+from src.models.schemas import CodeChunk, ErrorAnalysis
+from src.cache.fix_index import error_signature
+
+def touched_lines(old_code: str, new_code: str) -> Set[int]:
+    """1-based line numbers of the old code that were edited, or next to an insertion"""
+    matcher = difflib.SequenceMatcher(None, old_code.splitlines(), new_code.splitlines(), autojunk=False)
+    touched = set()
+    for tag, i1, i2, _, _ in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if i1 == i2:
+            # Pure insertion between old lines i1 and i1 + 1
+            touched.update((i1, i1 + 1))
+        else:
+            touched.update(range(i1 + 1, i2 + 1))
+    return touched
+
+def remap_lines(old_code: str, new_code: str, lines: List[int]) -> Optional[List[int]]:
+    """Map unchanged old line numbers to their position in the new code"""
+    matcher = difflib.SequenceMatcher(None, old_code.splitlines(), new_code.splitlines(), autojunk=False)
+    mapping = {}
+    for tag, i1, i2, j1, _ in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                mapping[i1 + offset + 1] = j1 + offset + 1
+    if any(line not in mapping for line in lines):
+        return None
+    return [mapping[line] for line in lines]
+
+def reusable_analysis(previous: Dict[str, Any], code: str, error_log: str) -> Optional[ErrorAnalysis]:
+    """Return the previous run's analysis if it still applies to the edited submission.
+
+    It applies when the traceback has the same signature and none of the
+    affected lines were edited. Line numbers are shifted to the new code.
+    """
+    analysis = previous.get("error_analysis")
+    if not analysis or not analysis.affected_lines:
+        return None
+    
+    # Compare raw logs: the condensed one drops frames that count in the signature
+    old_signature = error_signature(previous.get("raw_error_log") or previous.get("error_log", ""))
+    new_signature = error_signature(error_log)
+    if old_signature is None or new_signature is None:
+        return None
+    if (old_signature.key, old_signature.frame_shape) != (new_signature.key, new_signature.frame_shape):
+        return None
+    
+    old_code = previous.get("original_code", "")
+    if touched_lines(old_code, code) & set(analysis.affected_lines):
+        return None
+    new_lines = remap_lines(old_code, code, analysis.affected_lines)
+    if new_lines is None:
+        return None
+    
+    error_location = analysis.error_location
+    for old_line, new_line in zip(analysis.affected_lines, new_lines):
+        if old_line != new_line:
+            error_location = re.sub(rf"\bline {old_line}\b", f"line {new_line}", error_location)
+    
+    return ErrorAnalysis(
+        error_type=analysis.error_type,
+        error_location=error_location,
+        root_cause=analysis.root_cause,
+        severity=analysis.severity,
+        affected_lines=new_lines
+    )
+
+def edited_lines(old_code: str, new_code: str) -> Set[int]:
+    """1-based line numbers of the new code that were changed or inserted"""
+    matcher = difflib.SequenceMatcher(None, old_code.splitlines(), new_code.splitlines(), autojunk=False)
+    edited = set()
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "insert"):
+            edited.update(range(j1 + 1, j2 + 1))
+    return edited
+
+def focus_region(old_code: str, new_code: str, affected_lines: List[int],
+                 split_points: Iterable[int]) -> Optional[CodeChunk]:
+    """The definitions of the new code that hold the affected and edited lines.
+
+    Returns None when that is most of the file, so the fixer sees all of it.
+    """
+    lines = new_code.splitlines(keepends=True)
+    wanted = {line for line in set(affected_lines) | edited_lines(old_code, new_code) if 1 <= line <= len(lines)}
+    if not wanted:
+        return None
+    
+    starts = sorted({1, *split_points})
+    start = max(point for point in starts if point <= min(wanted))
+    end = min((point - 1 for point in starts if point > max(wanted)), default=len(lines))
+    if 2 * (end - start + 1) > len(lines):
+        return None
+    return CodeChunk(start_line=start, end_line=end, code="".join(lines[start - 1:end]))
@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, Dict, Optional
+from src.agents.parser_agent import ParserAgent
+from src.agents.fixer_agent import FixerAgent
+from src.agents.llm_call import CANCEL_POLL_SECONDS, LLM_CALL_THREADS, BudgetExhausted, check_budget
+from src.models.schemas import DebugStatus, ErrorAnalysis, SpeculationRecord, TokenUsage
+
+# Each speculative fix holds a thread for one LLM call, so size it like the call pool
+_executor = ThreadPoolExecutor(max_workers=LLM_CALL_THREADS, thread_name_prefix="speculative-fix")
+
+# Node key for the speculative fixer's token usage
+USAGE_NODE = "fixer_speculative"
+
+def is_consistent(provisional: ErrorAnalysis, analysis: ErrorAnalysis) -> bool:
+    """Whether a fix made from the raw traceback targets the error the parser found"""
+    if provisional.error_type.lower() not in analysis.error_type.lower():
+        return False
+    if provisional.affected_lines and analysis.affected_lines:
+        return bool(set(provisional.affected_lines) & set(analysis.affected_lines))
+    return True
+
+class SpeculativeParser:
+    """Parser node that overlaps the first fixer call with the parser call.
+
+    A fix is started from a provisional analysis read straight off the
+    traceback while the parser runs. If the parser's analysis agrees with it
+    (same error type and affected line), the speculative fix goes to review
+    directly; otherwise it is cancelled and the normal fixer runs.
+    """
+
+    def __init__(self, parser_agent: ParserAgent, fixer_agent: FixerAgent):
+        self.parser_agent = parser_agent
+        self.fixer_agent = fixer_agent
+    
+    def parse_error(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        provisional = self.parser_agent.quick_analysis(state["error_log"], state["language"])
+        if provisional is None:
+            return self.parser_agent.parse_error(state)
+        
+        spec_cancel = threading.Event()
+        spec_state = {
+            **state,
+            "error_analysis": provisional,
+            "proposed_fixes": [],
+            "reasoning_steps": [],
+            "iteration_history": [],
+            "cancel_event": spec_cancel,
+            # Kept apart so discarded work is not counted as the fixer's
+            "token_usage": {}
+        }
+        started = time.monotonic()
+        future = _executor.submit(self._timed_fix, spec_state)
+        
+        try:
+            state = self.parser_agent.parse_error(state)
+        except BaseException:
+            spec_cancel.set()
+            self._merge_usage(state, spec_state, future)
+            raise
+        parse_seconds = time.monotonic() - started
+        
+        analysis = state.get("error_analysis")
+        if state["status"] != DebugStatus.FIXING or analysis is None or not is_consistent(provisional, analysis):
+            spec_cancel.set()
+            usage = self._merge_usage(state, spec_state, future)
+            return self._record(state, False, "analysis disagrees with the traceback", parse_seconds, None, usage)
+        
+        try:
+            spec_state, fix_seconds = self._await_fix(state, future)
+        except BudgetExhausted:
+            spec_cancel.set()
+            self._merge_usage(state, spec_state, future)
+            raise
+        except Exception as e:
+            usage = self._merge_usage(state, spec_state, future)
+            return self._record(state, False, f"speculative fix failed - {e}", parse_seconds, None, usage)
+        
+        usage = self._merge_usage(state, spec_state, future)
+        if spec_state["status"] != DebugStatus.REVIEWING:
+            return self._record(state, False, "speculative fix failed", parse_seconds, fix_seconds, usage)
+        
+        # Adopt the speculative fix, reviewed against the parser's analysis
+        code_fix = spec_state["current_fix"]
+        state["current_fix"] = code_fix
+        state["proposed_fixes"].append(code_fix)
+        state["current_code"] = code_fix.fixed_code
+        state["status"] = DebugStatus.REVIEWING
+        state["reasoning_steps"].extend(f"{step} (speculative)" for step in spec_state["reasoning_steps"])
+        return self._record(state, True, "consistent with analysis", parse_seconds, fix_seconds, usage)
+    
+    def _await_fix(self, state: Dict[str, Any], future):
+        """Wait for the speculative fix, giving up as soon as the run is cancelled or out of time"""
+        # The speculative call watches its own event, so the run's is checked here
+        while True:
+            try:
+                return future.result(timeout=CANCEL_POLL_SECONDS)
+            except FutureTimeout:
+                check_budget(state)
+    
+    def _timed_fix(self, spec_state: Dict[str, Any]):
+        started = time.monotonic()
+        spec_state = self.fixer_agent.generate_fix(spec_state)
+        return spec_state, time.monotonic() - started
+    
+    def _merge_usage(self, state: Dict[str, Any], spec_state: Dict[str, Any], future) -> TokenUsage:
+        """Wait for the (possibly cancelled) speculative fix and file its usage separately"""
+        # A cancelled call returns within one poll interval
+        wait([future])
+        usage = spec_state["token_usage"].get("fixer", TokenUsage())
+        if usage.calls:
+            state["token_usage"][USAGE_NODE] = usage
+        return usage
+    
+    def _record(self, state: Dict[str, Any], used: bool, reason: str,
+                parse_seconds: float, fix_seconds: Optional[float], usage: TokenUsage) -> Dict[str, Any]:
+        """Record the outcome; the saving is the fixer time hidden behind the parser,
+        the cost is the speculative fixer's tokens when its fix is discarded"""
+        state["speculation"] = SpeculationRecord(
+            used=used,
+            reason=reason,
+            parse_seconds=parse_seconds,
+            fix_seconds=fix_seconds,
+            saved_seconds=min(parse_seconds, fix_seconds) if used and fix_seconds is not None else 0.0,
+            llm_calls=usage.calls,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            wasted_tokens=0 if used else usage.total_tokens
+        )
+        state["reasoning_steps"].append(f"Workflow: Speculative fix {'used' if used else 'discarded'} ({reason})")
+        return state
@@ -0,0 +1,70 @@
+"""Run the batch CLI end to end on recorded LLM responses.
+
+The replay file is written by benchmarks/make_replay_fixture.py from the
+canned responses in batch_jobs.jsonl; re-run it after changing a prompt.
+"""
+import json
+import os
+
+from src.app import batch_cli
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+JOBS = os.path.join(FIXTURES, "batch_jobs.jsonl")
+REPLAY = os.path.join(FIXTURES, "replay.jsonl")
+
+
+def run_batch(tmp_path, monkeypatch, *args):
+    # main() exports the backend for its worker processes; restore it afterwards
+    monkeypatch.setenv("LLM_BACKEND", "openai")
+    monkeypatch.setenv("LLM_REPLAY_PATH", REPLAY)
+    output = tmp_path / "results.jsonl"
+    assert batch_cli.main([JOBS, "-o", str(output), "--workers", "1",
+                           "--llm-backend", "replay", "--replay-file", REPLAY, *args]) == 0
+    with open(output, encoding="utf-8") as f:
+        return {record["id"]: record for record in map(json.loads, f)}
+
+
+def test_batch_fixes_every_job(tmp_path, monkeypatch):
+    records = run_batch(tmp_path, monkeypatch)
+    
+    assert set(records) == {"zero-division", "missing-colon", "undefined-property"}
+    for record in records.values():
+        assert record["status"] == "completed", record.get("error_message")
+        assert record["is_fixed"]
+    
+    assert "if not values:" in records["zero-division"]["fixed_code"]
+    assert records["zero-division"]["error_type"] == "ZeroDivisionError"
+    assert records["missing-colon"]["fixed_code"].startswith("def greet(name):")
+    assert "items.length" in records["undefined-property"]["fixed_code"]
+
+
+def test_batch_skips_review_for_compiling_syntax_fix(tmp_path, monkeypatch):
+    records = run_batch(tmp_path, monkeypatch)
+    
+    record = records["missing-colon"]
+    assert "Reviewer: Policy chose skip review" in " ".join(record["reasoning_steps"])
+    assert [decision["action"] for decision in record["review_decisions"]] == ["skip"]
+    assert record["review_decisions"][0]["compiles"] is True
+    assert record["llm_calls_saved"] == 1
+    assert records["zero-division"]["llm_calls_saved"] == 0
+    # The replay file has no reviewer answer for this job, so a review call would have failed
+
+
+def test_resume_skips_finished_jobs(tmp_path, monkeypatch):
+    run_batch(tmp_path, monkeypatch, "--offset", "2")
+    records = run_batch(tmp_path, monkeypatch, "--resume")
+    
+    with open(tmp_path / "results.jsonl", encoding="utf-8") as f:
+        ids = [json.loads(line)["id"] for line in f]
+    assert sorted(ids) == sorted(records)
+    assert len(ids) == 3
+
+
+def test_iter_jobs_reads_directory_pairs(tmp_path):
+    (tmp_path / "app.py").write_text("print(1 / 0)\n")
+    (tmp_path / "app.log").write_text("ZeroDivisionError: division by zero\n")
+    (tmp_path / "orphan.py").write_text("pass\n")
+    
+    jobs = list(batch_cli.iter_jobs(str(tmp_path)))
+    assert [job["id"] for job in jobs] == ["app.py"]
+    assert jobs[0]["error_log"].startswith("ZeroDivisionError")
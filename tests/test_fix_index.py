@@ -0,0 +1,99 @@
+from src.cache.fix_index import FixIndex, error_signature
+from src.models.schemas import CodeFix, ErrorAnalysis
+
+CODE = "def average(values):\n    return sum(values) / len(values)\n\nprint(average([]))\n"
+LOG = """Traceback (most recent call last):
+  File "/home/ana/stats.py", line 4, in <module>
+    print(average([]))
+  File "/home/ana/stats.py", line 2, in average
+    return sum(values) / len(values)
+ZeroDivisionError: division by zero
+"""
+FIXED = "def average(values):\n    if not values:\n        return 0.0\n    return sum(values) / len(values)\n\nprint(average([]))\n"
+
+
+def approved_fix():
+    analysis = ErrorAnalysis("ZeroDivisionError", "line 2, in average", "empty list", "medium", [2])
+    return analysis, CodeFix(CODE, FIXED, "Guard empty input", 0.9, "Add a guard")
+
+
+def test_signature_ignores_paths_and_values():
+    other = LOG.replace("/home/ana", "/srv/app").replace("line 4", "line 40")
+    
+    assert error_signature(LOG) == error_signature(other)
+    assert error_signature("no exception here") is None
+    assert error_signature("KeyError: 'user_17'").message == "<str>"
+
+
+def test_lookup_finds_exact_and_similar_code():
+    index = FixIndex()
+    assert index.add(CODE, LOG, *approved_fix())
+    
+    exact = index.lookup(CODE, LOG)
+    assert exact.exact_code and exact.similarity == 1.0
+    
+    renamed = CODE.replace("print(average([]))", "result = average([])\nprint(result)")
+    similar = index.lookup(renamed, LOG)
+    assert similar is not None and not similar.exact_code
+    assert similar.entry.code_fix.fixed_code == FIXED
+
+
+def test_lookup_misses_other_errors():
+    index = FixIndex()
+    index.add(CODE, LOG, *approved_fix())
+    
+    assert index.lookup(CODE, LOG.replace("ZeroDivisionError", "ValueError")) is None
+    assert index.lookup(CODE, "no exception here") is None
+
+
+def test_newer_fix_replaces_same_code():
+    index = FixIndex()
+    analysis, fix = approved_fix()
+    index.add(CODE, LOG, analysis, fix)
+    index.add(CODE, LOG, analysis, CodeFix(CODE, FIXED.replace("0.0", "None"), "Return None", 0.9, ""))
+    
+    assert len(index) == 1
+    assert "return None" in index.lookup(CODE, LOG).entry.code_fix.fixed_code
+
+
+def test_entries_survive_restart_and_are_shared(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    writer = FixIndex(path)
+    reader = FixIndex(path, refresh_interval=0)
+    writer.add(CODE, LOG, *approved_fix())
+    
+    assert reader.lookup(CODE, LOG) is not None
+    restarted = FixIndex(path)
+    assert len(restarted) == 1
+    assert restarted.lookup(CODE, LOG).entry.error_analysis.affected_lines == [2]
+
+
+def test_bucket_size_is_bounded():
+    index = FixIndex(max_bucket_size=2)
+    analysis, fix = approved_fix()
+    for i in range(5):
+        index.add(CODE + f"x = {i}\n", LOG, analysis, fix)
+    
+    assert len(index) == 2
+
+
+def test_unparseable_code_only_matches_itself():
+    index = FixIndex()
+    log = '  File "app.py", line 2\n    print("hi"\nSyntaxError: invalid syntax\n'
+    analysis = ErrorAnalysis("SyntaxError", "line 2", "missing paren on print", "low", [2])
+    broken = 'x=1\nprint("hi"\n'
+    index.add(broken, log, analysis, CodeFix(broken, 'x=1\nprint("hi")\n', "Close the paren", 0.9, ""))
+    
+    assert index.lookup("def f(:\n", log.replace("line 2", "line 1")) is None
+    assert index.lookup(broken, log).exact_code
+
+
+def test_javascript_code_has_no_fingerprint_match():
+    index = FixIndex()
+    log = "TypeError: Cannot read properties of undefined (reading 'name')\n    at first (/app/a.js:2:19)\n"
+    code = "function first(items) {\n  return items[0].name;\n}\n"
+    index.add(code, log, ErrorAnalysis("TypeError", "line 2", "empty array", "medium", [2]),
+              CodeFix(code, code, "", 0.9, ""))
+    
+    other = "const user = users.find(u => u.id === id);\nconsole.log(user.name);\n"
+    assert index.lookup(other, log) is None
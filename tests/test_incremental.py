@@ -0,0 +1,91 @@
+from src.languages.registry import get_plugin
+from src.models.schemas import ErrorAnalysis
+from src.workflow.incremental import focus_region, remap_lines, reusable_analysis, touched_lines
+
+CODE = """import math
+
+
+def area(radius):
+    return math.pi * radius ** 2
+
+
+def average(values):
+    return sum(values) / len(values)
+
+
+def report(values):
+    print("mean", average(values))
+    print("areas", [area(v) for v in values])
+
+
+report([])
+"""
+LOG = """Traceback (most recent call last):
+  File "app.py", line 17, in <module>
+    report([])
+  File "app.py", line 13, in report
+    print("mean", average(values))
+  File "app.py", line 9, in average
+    return sum(values) / len(values)
+ZeroDivisionError: division by zero
+"""
+
+
+def previous_run(code=CODE, log=LOG):
+    analysis = ErrorAnalysis("ZeroDivisionError", "line 9, in average", "empty list", "medium", [9])
+    return {"original_code": code, "raw_error_log": log, "error_log": "condensed", "error_analysis": analysis}
+
+
+def test_touched_and_remapped_lines():
+    edited = CODE.replace("    return math.pi", "    # circle\n    return math.pi")
+    
+    assert touched_lines(CODE, edited) == {4, 5}
+    assert remap_lines(CODE, edited, [9, 13]) == [10, 14]
+    assert remap_lines(CODE, edited, [5]) == [6]
+    assert remap_lines(CODE, CODE.replace("radius ** 2", "radius * radius"), [5]) is None
+
+
+def test_reuses_analysis_after_unrelated_edit():
+    edited = CODE.replace("    return math.pi", "    # circle\n    return math.pi")
+    log = LOG.replace("line 17", "line 18").replace("line 13", "line 14").replace("line 9", "line 10")
+    
+    analysis = reusable_analysis(previous_run(), edited, log)
+    assert analysis.affected_lines == [10]
+    assert analysis.error_location == "line 10, in average"
+
+
+def test_no_reuse_when_affected_line_edited():
+    edited = CODE.replace("sum(values) / len(values)", "sum(values) / max(len(values), 0)")
+    
+    assert reusable_analysis(previous_run(), edited, LOG) is None
+
+
+def test_no_reuse_when_error_changes():
+    log = LOG.replace("ZeroDivisionError: division by zero", "TypeError: unsupported operand")
+    
+    assert reusable_analysis(previous_run(), CODE, log) is None
+
+
+def test_compares_raw_logs():
+    # The condensed log of the previous run has no frames; the raw one must be used
+    previous = previous_run()
+    assert reusable_analysis(previous, CODE, LOG) is not None
+    del previous["raw_error_log"]
+    assert reusable_analysis(previous, CODE, LOG) is None
+
+
+def test_focus_region_is_the_edited_definition():
+    edited = CODE.replace("def average(values):\n", "def average(values):\n    \"\"\"Mean of values\"\"\"\n")
+    points = get_plugin("python").split_points(edited)
+    
+    region = focus_region(CODE, edited, [10], points)
+    assert (region.start_line, region.end_line) == (8, 12)
+    assert region.code.startswith("def average")
+    assert "def report" not in region.code
+
+
+def test_focus_region_none_when_most_of_file():
+    edited = CODE.replace("import math", "import cmath as math").replace("report([])", "report([1])")
+    points = get_plugin("python").split_points(edited)
+    
+    assert focus_region(CODE, edited, [9], points) is None
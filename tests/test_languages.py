@@ -0,0 +1,65 @@
+from src.languages.registry import detect_language, get_plugin
+
+JSON_TRACEBACK = """Traceback (most recent call last):
+  File "/srv/app/config.py", line 906, in <module>
+    settings = load("settings.json")
+  File "/srv/app/config.py", line 812, in load
+    return json.loads(text)
+  File "/usr/lib/python3.11/json/__init__.py", line 346, in loads
+    return _default_decoder.decode(s)
+  File "/usr/lib/python3.11/json/decoder.py", line 337, in decode
+    obj, end = self.raw_decode(s, idx=_w(s, 0).end())
+  File "/usr/lib/python3.11/json/decoder.py", line 355, in raw_decode
+    raise JSONDecodeError("Expecting value", s, err.value) from None
+json.decoder.JSONDecodeError: Expecting value: line 1 column 1 (char 0)
+"""
+
+
+def test_python_traceback_skips_library_frames():
+    traceback = get_plugin("python").parse_traceback(JSON_TRACEBACK)
+    
+    assert traceback.error_type == "JSONDecodeError"
+    assert (traceback.file, traceback.line_number, traceback.function) == ("/srv/app/config.py", 812, "load")
+
+
+def test_python_traceback_skips_site_packages_and_windows_stdlib():
+    log = r"""Traceback (most recent call last):
+  File "C:\work\main.py", line 7, in <module>
+    fetch()
+  File "C:\work\.venv\Lib\site-packages\requests\api.py", line 73, in get
+    return request("get", url, params=params, **kwargs)
+  File "C:\Python311\Lib\socket.py", line 962, in getaddrinfo
+    for res in _socket.getaddrinfo(host, port, family, type, proto, flags):
+socket.gaierror: [Errno 11001] getaddrinfo failed
+ConnectionError: failed
+"""
+    assert get_plugin("python").parse_traceback(log).line_number == 7
+
+
+def test_python_traceback_falls_back_to_library_frame():
+    log = JSON_TRACEBACK.replace("/srv/app/config.py", "/usr/lib/python3.11/runpy.py")
+    
+    assert get_plugin("python").parse_traceback(log).line_number == 355
+
+
+def test_javascript_traceback_skips_node_modules():
+    log = """TypeError: Cannot read properties of undefined (reading 'map')
+    at render (/app/node_modules/react-dom/cjs/react-dom.development.js:100:10)
+    at List (/app/src/List.js:12:20)
+    at node:internal/main/run_main_module:23:47
+"""
+    traceback = get_plugin("javascript").parse_traceback(log)
+    
+    assert (traceback.file, traceback.line_number) == ("/app/src/List.js", 12)
+
+
+def test_detect_language():
+    assert detect_language("def f():\n    pass\n", JSON_TRACEBACK) == "python"
+    assert detect_language("function f() {}\n", "TypeError: x\n    at f (/app/a.js:1:1)\n") == "javascript"
+
+
+def test_check_syntax():
+    python = get_plugin("python")
+    
+    assert python.check_syntax("x = 1\n") is True
+    assert python.check_syntax("def f(:\n") is False
@@ -0,0 +1,64 @@
+from src.agents.log_condenser import LogCondenser
+
+TRACEBACK = """Traceback (most recent call last):
+  File "app.py", line 10, in <module>
+    main()
+  File "app.py", line 6, in main
+    return 1 / 0
+ZeroDivisionError: division by zero
+"""
+
+
+def test_drops_noise_and_keeps_traceback():
+    log = "Collecting deps...\n" * 200 + TRACEBACK + "Shutting down\n"
+    condensed = LogCondenser().condense(log)
+    
+    assert "Collecting deps" not in condensed.text
+    assert 'File "app.py", line 6, in main' in condensed.text
+    assert condensed.text.rstrip().endswith("ZeroDivisionError: division by zero")
+    assert condensed.traceback_count == 1
+    assert condensed.original_chars == len(log)
+
+
+def test_identical_tracebacks_kept_once_with_count():
+    condensed = LogCondenser().condense(TRACEBACK * 3)
+    
+    assert condensed.traceback_count == 3
+    assert condensed.unique_tracebacks == 1
+    assert condensed.text.count("ZeroDivisionError") == 1
+    assert "occurred 3 times" in condensed.text
+
+
+def test_recursion_collapsed():
+    frame = '  File "app.py", line 2, in walk\n    return walk(n - 1)\n'
+    log = "Traceback (most recent call last):\n" + frame * 500 + "RecursionError: maximum recursion depth exceeded\n"
+    condensed = LogCondenser().condense(log)
+    
+    assert condensed.text.count("in walk") < 5
+    assert "repeated" in condensed.text
+    assert "RecursionError" in condensed.text
+
+
+def test_strips_ci_timestamps():
+    log = "".join(f"2024-05-01T12:00:00.1234567Z {line}\n" for line in TRACEBACK.splitlines())
+    condensed = LogCondenser().condense(log)
+    
+    assert "2024-05-01" not in condensed.text
+    assert "ZeroDivisionError: division by zero" in condensed.text
+
+
+def test_log_without_traceback_keeps_error_lines():
+    log = "step 1 ok\nFAILED tests/test_app.py::test_div\nstep 2 ok\n"
+    condensed = LogCondenser().condense(log)
+    
+    assert condensed.text == "FAILED tests/test_app.py::test_div"
+
+
+def test_output_fits_budget():
+    frames = "".join(f'  File "mod{i}.py", line {i}, in f{i}\n    f{i + 1}()\n' for i in range(400))
+    log = "Traceback (most recent call last):\n" + frames + "ValueError: bad\n"
+    condenser = LogCondenser(token_budget=200)
+    condensed = condenser.condense(log)
+    
+    assert len(condensed.text) <= condenser.char_budget
+    assert "ValueError: bad" in condensed.text
@@ -0,0 +1,72 @@
+import json
+from types import SimpleNamespace
+
+from src.agents.parser_agent import ParserAgent
+from src.cache.fix_index import FixIndex
+from src.languages.registry import get_plugin
+from src.models.schemas import CodeFix, DebugStatus, ErrorAnalysis
+
+ANSWER = {"error_type": "TypeError", "error_location": "line 2", "root_cause": "items is empty",
+          "severity": "medium", "affected_lines": [2]}
+
+
+class ScriptedLLM:
+    """Answers every prompt with the same canned response"""
+
+    model_name = "gpt-4"
+
+    def __init__(self, response: dict):
+        self.content = json.dumps(response)
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(content=self.content, usage_metadata=None, response_metadata={})
+
+
+def make_state(code, error_log, language):
+    return {"original_code": code, "error_log": error_log, "language": language, "reasoning_steps": [],
+            "token_usage": {}, "deadline": None, "cancel_event": None, "status": DebugStatus.PARSING}
+
+
+def test_python_near_duplicate_reuses_analysis():
+    code = "def first(items):\n    return items[0]['name']\n\nfirst([])\n"
+    log = ('Traceback (most recent call last):\n  File "a.py", line 4, in <module>\n    first([])\n'
+           '  File "a.py", line 2, in first\n    return items[0][\'name\']\nIndexError: list index out of range\n')
+    index = FixIndex()
+    index.add(code, log, ErrorAnalysis("IndexError", "line 2", "empty list", "medium", [2]),
+              CodeFix(code, code.replace("items[0]", "(items or [{}])[0]"), "", 0.9, ""))
+    agent = ParserAgent(fix_index=index, api_key="unused")
+    agent.llm = ScriptedLLM(ANSWER)
+    
+    state = agent.parse_error(make_state(code, log, "python"))
+    assert agent.llm.calls == 0
+    assert state["error_analysis"].root_cause == "empty list"
+
+
+def test_index_not_used_for_javascript():
+    log = "TypeError: Cannot read properties of undefined (reading 'name')\n    at first (/app/a.js:2:19)\n"
+    code = "function first(items) {\n  return items[0].name;\n}\n"
+    index = FixIndex()
+    index.add(code, log, ErrorAnalysis("TypeError", "line 2", "another user's cause", "medium", [2]),
+              CodeFix(code, code, "", 0.9, ""))
+    agent = ParserAgent(fix_index=index, api_key="unused")
+    agent.llm = ScriptedLLM(ANSWER)
+    
+    state = agent.parse_error(make_state(code, log, "javascript"))
+    assert agent.llm.calls == 1
+    assert state.get("similar_fix") is None
+    assert state["error_analysis"].root_cause == "items is empty"
+
+
+def test_long_code_excerpt_is_around_the_user_frame():
+    code = "".join(f"x{i} = {i}\n" for i in range(1, 300)) + "def load(text):\n    return json.loads(text)\n"
+    log = ('Traceback (most recent call last):\n  File "/srv/app/config.py", line 301, in load\n'
+           '    return json.loads(text)\n  File "/usr/lib/python3.11/json/decoder.py", line 20, in decode\n'
+           '    obj, end = self.raw_decode(s)\njson.decoder.JSONDecodeError: Expecting value\n')
+    agent = ParserAgent(api_key="unused")
+    
+    excerpt = agent._code_for_prompt(code, log, get_plugin("python"))
+    assert "def load(text):" in excerpt
+    assert "x20 = 20" not in excerpt
+    assert agent.quick_analysis(log).affected_lines == [301]
@@ -0,0 +1,63 @@
+from src.agents.prompt_budget import focus_on_change, implicated_chunk, split_code, stitch
+from src.languages.registry import get_plugin
+
+CODE = "".join(
+    f"def f{i}(x):\n    y = x + {i}\n    return y\n\n" for i in range(10)
+)
+
+
+def split_points(code):
+    return get_plugin("python").split_points(code)
+
+
+def test_split_code_cuts_at_definitions():
+    chunks = split_code(CODE, max_tokens=20, split_points=split_points(CODE))
+    
+    assert len(chunks) > 1
+    assert "".join(chunk.code for chunk in chunks) == CODE
+    for chunk in chunks:
+        assert chunk.code.startswith("def ")
+    for before, after in zip(chunks, chunks[1:]):
+        assert after.start_line == before.end_line + 1
+
+
+def test_split_code_windows_oversized_definition():
+    code = "def big():\n" + "".join(f"    x{i} = {i}\n" for i in range(100))
+    chunks = split_code(code, max_tokens=25, split_points=split_points(code))
+    
+    assert len(chunks) > 1
+    assert "".join(chunk.code for chunk in chunks) == code
+    assert all(len(chunk.code) <= 100 for chunk in chunks)
+
+
+def test_small_code_is_one_chunk():
+    chunks = split_code(CODE, max_tokens=10_000, split_points=split_points(CODE))
+    
+    assert len(chunks) == 1
+    assert (chunks[0].start_line, chunks[0].end_line) == (1, CODE.count("\n"))
+
+
+def test_implicated_chunk_holds_most_affected_lines():
+    chunks = split_code(CODE, max_tokens=20, split_points=split_points(CODE))
+    chunk = implicated_chunk(chunks, [14, 15])
+    
+    assert chunk.start_line <= 14 and 15 <= chunk.end_line
+    assert implicated_chunk(chunks, [1000]) is None
+
+
+def test_stitch_replaces_chunk_and_keeps_blank_lines():
+    chunks = split_code(CODE, max_tokens=20, split_points=split_points(CODE))
+    chunk = implicated_chunk(chunks, [14])
+    fixed_chunk = chunk.code.replace("x + 3", "x - 3").rstrip("\n")
+    
+    stitched = stitch(CODE, chunk, fixed_chunk)
+    assert stitched == CODE.replace("x + 3", "x - 3")
+
+
+def test_focus_on_change_numbers_changed_region():
+    fixed = CODE.replace("x + 7", "x - 7")
+    original_excerpt, fixed_excerpt = focus_on_change(CODE, fixed, context_lines=1)
+    
+    assert "x + 7" in original_excerpt and "x - 7" in fixed_excerpt
+    assert "x + 0" not in fixed_excerpt
+    assert "30" in fixed_excerpt
@@ -0,0 +1,71 @@
+from src.agents.review_policy import ApprovalPolicy, count_changed_lines
+from src.languages.base import LanguagePlugin
+from src.models.schemas import CodeFix, ErrorAnalysis
+
+ORIGINAL = "def greet(name)\n    return 'Hello, ' + name\n"
+FIXED = "def greet(name):\n    return 'Hello, ' + name\n"
+
+
+def analysis(error_type):
+    return ErrorAnalysis(error_type, "line 1", "cause", "low", [1])
+
+
+def fix(fixed_code, confidence, original_code=ORIGINAL):
+    return CodeFix(original_code, fixed_code, "explanation", confidence, "summary")
+
+
+class UncheckedPlugin(LanguagePlugin):
+    """A language without a syntax checker: check_syntax returns None"""
+    name = "unchecked"
+
+
+def test_count_changed_lines():
+    assert count_changed_lines(ORIGINAL, FIXED) == 1
+    assert count_changed_lines(ORIGINAL, ORIGINAL) == 0
+    assert count_changed_lines("a\n", "a\nb\nc\n") == 2
+
+
+def test_compiling_syntax_fix_skips_review():
+    decision = ApprovalPolicy().decide(fix(FIXED, 0.85), analysis("SyntaxError"))
+    
+    assert decision.action == "skip"
+    assert decision.compiles is True
+
+
+def test_non_compiling_fix_gets_full_review():
+    decision = ApprovalPolicy().decide(fix(ORIGINAL.replace("name)", "name"), 0.99), analysis("SyntaxError"))
+    
+    assert decision.action == "full"
+    assert decision.compiles is False
+
+
+def test_unchanged_code_gets_full_review():
+    assert ApprovalPolicy().decide(fix(ORIGINAL, 0.99), analysis("SyntaxError")).action == "full"
+
+
+def test_confidence_selects_review_model():
+    original = "def f(x):\n    return 1 / x\n"
+    fixed = "def f(x):\n    return 1 / x if x else 0\n"
+    policy = ApprovalPolicy()
+    
+    assert policy.decide(fix(fixed, 0.97, original), analysis("ZeroDivisionError")).action == "skip"
+    assert policy.decide(fix(fixed, 0.85, original), analysis("ZeroDivisionError")).action == "cheap"
+    assert policy.decide(fix(fixed, 0.5, original), analysis("ZeroDivisionError")).action == "full"
+
+
+def test_large_change_is_reviewed():
+    original = "def f(x):\n    return 1 / x\n"
+    fixed = "def f(x):\n" + "".join(f"    y{i} = {i}\n" for i in range(5)) + "    return 1 / x if x else 0\n"
+    
+    assert ApprovalPolicy().decide(fix(fixed, 0.99, original), analysis("ZeroDivisionError")).action == "cheap"
+
+
+def test_unknown_syntax_never_skips_review():
+    plugin = UncheckedPlugin()
+    
+    syntax = ApprovalPolicy().decide(fix(FIXED, 0.99), analysis("SyntaxError"), plugin)
+    assert syntax.compiles is None
+    assert syntax.action == "cheap"
+    
+    runtime = ApprovalPolicy().decide(fix(FIXED, 0.99), analysis("TypeError"), plugin)
+    assert runtime.action == "cheap"
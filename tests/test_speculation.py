@@ -0,0 +1,59 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from src.models.schemas import DebugStatus
+from src.workflow.debug_workflow import DebugWorkflow
+from src.workflow.speculation import USAGE_NODE
+
+CODE = "def average(values):\n    return sum(values) / len(values)\n\nprint(average([]))\n"
+LOG = ('Traceback (most recent call last):\n  File "stats.py", line 4, in <module>\n    print(average([]))\n'
+       '  File "stats.py", line 2, in average\n    return sum(values) / len(values)\n'
+       'ZeroDivisionError: division by zero\n')
+ANALYSIS = {"error_type": "ZeroDivisionError", "error_location": "line 2, in average",
+            "root_cause": "empty list", "severity": "medium", "affected_lines": [2]}
+FIX = {"fixed_code": CODE.replace("    return sum", "    if not values:\n        return 0.0\n    return sum"),
+       "explanation": "Guard empty input", "confidence_score": 0.9, "changes_summary": "Add a guard"}
+
+
+class SlowLLM:
+    """Answers with a canned response after `delay` seconds"""
+
+    model_name = "gpt-4"
+
+    def __init__(self, response: dict, delay: float = 0.0):
+        self.content = json.dumps(response)
+        self.delay = delay
+
+    def invoke(self, messages, **kwargs):
+        time.sleep(self.delay)
+        return SimpleNamespace(content=self.content, usage_metadata=None, response_metadata={})
+
+
+def speculative_workflow(fix_delay: float) -> DebugWorkflow:
+    workflow = DebugWorkflow(speculative=True, api_key="unused")
+    workflow.parser_agent.llm = SlowLLM(ANALYSIS)
+    workflow.fixer_agent.llm = SlowLLM(FIX, fix_delay)
+    workflow.reviewer_agent.llm = workflow.reviewer_agent.cheap_llm = SlowLLM(
+        {"is_fix_valid": True, "review_feedback": "ok", "confidence_score": 0.9, "suggestions": "None"})
+    return workflow
+
+
+def test_consistent_speculative_fix_is_used():
+    result = speculative_workflow(0.0).debug_code(CODE, LOG, timeout=30)
+    
+    assert result["speculation"].used
+    assert result["final_result"].fixed_code == FIX["fixed_code"]
+    assert USAGE_NODE in result["token_usage"]
+
+
+def test_cancel_abandons_speculative_fix():
+    workflow = speculative_workflow(4.0)
+    cancel_event = threading.Event()
+    threading.Timer(0.5, cancel_event.set).start()
+    
+    started = time.monotonic()
+    result = workflow.debug_code(CODE, LOG, timeout=30, cancel_event=cancel_event)
+    assert time.monotonic() - started < 1.5
+    assert result["status"] == DebugStatus.CANCELLED
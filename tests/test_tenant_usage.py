@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from src.cache.shared_store import SQLiteStore
+from src.cache.tenant_usage import TenantUsage
+from src.models.schemas import TokenUsage
+
+
+class FlakyStore:
+    """Wraps a store and fails the `incrby` calls whose numbers are in `fail_calls`"""
+
+    def __init__(self, store):
+        self.store = store
+        self.fail_calls = set()
+        self.calls = 0
+        self.writes = 0
+
+    def incrby(self, key, amount):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise ConnectionError("store unavailable")
+        self.writes += 1
+        return self.store.incrby(key, amount)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FlakyStore(SQLiteStore(str(tmp_path / "state.db")))
+
+
+def usage(tokens):
+    return TokenUsage(input_tokens=tokens, output_tokens=0, cost_usd=tokens / 1_000_000)
+
+
+def test_failed_flush_keeps_totals_for_retry(store):
+    tenants = TenantUsage(store, flush_interval=3600)
+    tenants.add("key-a", usage(100))
+    
+    store.fail_calls = {1}
+    with pytest.raises(ConnectionError):
+        tenants.flush()
+    assert tenants.get("key-a")[0] == 100
+    
+    tenants.flush()
+    assert TenantUsage(store).get("key-a") == (100, 0.0001)
+    assert tenants.get("key-a")[0] == 100
+
+
+def test_partly_written_totals_are_not_counted_twice(store):
+    tenants = TenantUsage(store, flush_interval=3600)
+    tenants.add("key-a", usage(100))
+    
+    # The token counter is written, the cost counter fails
+    store.fail_calls = {2}
+    with pytest.raises(ConnectionError):
+        tenants.flush()
+    
+    tenants.flush()
+    assert TenantUsage(store).get("key-a") == (100, 0.0001)
+
+
+def test_timer_flushes_idle_worker(store):
+    tenants = TenantUsage(store, flush_interval=0.1)
+    tenants.start()
+    try:
+        tenants.add("key-a", usage(10))
+        time.sleep(0.3)
+        assert TenantUsage(store).get("key-a")[0] == 10
+    finally:
+        tenants.close()
+
+
+def test_requests_leave_flushing_to_the_timer(store):
+    tenants = TenantUsage(store, flush_interval=3600)
+    tenants.start()
+    # The interval has passed, but the request must not write to the store
+    tenants._last_flush = float("-inf")
+    tenants.add("key-a", usage(5))
+    assert store.writes == 0
+    
+    tenants.close()
+    assert TenantUsage(store).get("key-a")[0] == 5